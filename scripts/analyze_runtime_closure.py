@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Compute the real DT_NEEDED closure of an installed Spack prefix.
+
+Walks every ELF file in the prefix (lib/debug and .spack are skipped) and
+resolves each DT_NEEDED entry the way ld.so does. It first checks sonames
+already loaded by the objects that load it. The search path is then:
+- without DT_RUNPATH: the DT_RPATH of the object and of its loaders
+- LD_LIBRARY_PATH
+- the object's own DT_RUNPATH, with $ORIGIN
+- the system library directories
+Other dependency prefixes are never searched, so a library that only
+resolves through them is reported as missing. Libraries found in
+dependency prefixes are followed too, which gives the full runtime
+closure. For each direct dependency of the installed spec, the report
+gives the files of the prefix that load it directly and the ones that
+only reach it through another dependency. It lists:
+
+    unused     link/run dependencies no file of the prefix loads directly,
+               which are candidates for type="build" or for removal.
+               Runtime-only and dlopen() users such as lua show up here; use
+               --allow to acknowledge them. Those that other dependencies
+               still load are also listed under transitive_only.
+    missing    DT_NEEDED entries that resolve nowhere (exit status 1), except
+               driver-provided libraries such as libnvidia-ml.so.1 from
+               nvml-headers, which are listed under driver_provided
+
+Run it against an installed Slurm:
+
+    ./scripts/analyze_runtime_closure.py $(spack location -i slurm_factory.slurm) \
+        --allow hwloc --allow munge
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple
+
+SYSTEM_DIRS = [
+    "/lib64",
+    "/usr/lib64",
+    "/lib",
+    "/usr/lib",
+    "/lib/x86_64-linux-gnu",
+    "/usr/lib/x86_64-linux-gnu",
+    "/lib/aarch64-linux-gnu",
+    "/usr/lib/aarch64-linux-gnu",
+]
+SKIP_DIRS = {".spack", "debug", ".debug"}
+NEEDED_RE = re.compile(r"\(NEEDED\)\s+Shared library: \[([^\]]+)\]")
+RPATH_RE = re.compile(r"\((RPATH|RUNPATH)\)\s+Library r(?:un)?path: \[([^\]]*)\]")
+
+#: Sonames installed by the GPU driver, not by any package (nvml-headers only ships a link stub)
+DRIVER_PROVIDED = {"libnvidia-ml.so.1", "libcuda.so.1"}
+
+
+def is_elf(path: Path) -> bool:
+    """Return True if ``path`` is a regular ELF file."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == b"\x7fELF"
+    except OSError:
+        return False
+
+
+def elf_files(prefix: Path) -> list[Path]:
+    """Return every ELF file below ``prefix`` except debug files and Spack metadata."""
+    found = []
+    for root, dirs, files in os.walk(prefix):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            path = Path(root) / name
+            if not path.is_symlink() and is_elf(path):
+                found.append(path)
+    return found
+
+
+class Dynamic(NamedTuple):
+    """DT_NEEDED names and the DT_RPATH/DT_RUNPATH search dirs of an ELF file."""
+
+    needed: list[str]
+    rpath: list[str]
+    runpath: list[str]
+
+
+def dynamic_section(path: Path) -> Dynamic:
+    """Return the dynamic section entries of an ELF file, with $ORIGIN expanded."""
+    output = subprocess.run(["readelf", "-d", "-W", str(path)], capture_output=True, text=True).stdout
+    paths = {"RPATH": [], "RUNPATH": []}
+    for tag, entry in RPATH_RE.findall(output):
+        for d in entry.split(":"):
+            if d:
+                paths[tag].append(
+                    d.replace("${ORIGIN}", str(path.parent)).replace("$ORIGIN", str(path.parent))
+                )
+    return Dynamic(NEEDED_RE.findall(output), paths["RPATH"], paths["RUNPATH"])
+
+
+def installed_dependencies(prefix: Path, spack: str) -> tuple[str, dict[str, dict]]:
+    """Return the root name and {dep name: {deptypes, prefix}} from <prefix>/.spack/spec.json."""
+    spec_json = prefix / ".spack" / "spec.json"
+    nodes = json.loads(spec_json.read_text())["spec"]["nodes"]
+    root = nodes[0]
+    by_hash = {node["hash"]: node for node in nodes}
+
+    deps = {}
+    for dep in root.get("dependencies", []):
+        deptypes = dep.get("parameters", {}).get("deptypes") or dep.get("type", [])
+        deps[dep["name"]] = {"hash": dep["hash"], "deptypes": sorted(deptypes)}
+
+    # Prefixes of every node reachable through link/run edges, so the closure
+    # can be followed. Build-only nodes are not installed when the spec came
+    # from a buildcache, and `spack find` fails on unknown hashes.
+    reachable, stack = {root["hash"]}, [root]
+    while stack:
+        for dep in stack.pop().get("dependencies", []):
+            deptypes = dep.get("parameters", {}).get("deptypes") or dep.get("type", [])
+            if {"link", "run"} & set(deptypes) and dep["hash"] not in reachable and dep["hash"] in by_hash:
+                reachable.add(dep["hash"])
+                stack.append(by_hash[dep["hash"]])
+
+    def find(*hashes: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [spack, "find", "--format", "{hash} {name} {prefix}", *(f"/{h}" for h in hashes)],
+            capture_output=True,
+            text=True,
+        )
+
+    result = find(*sorted(reachable))
+    outputs = [result.stdout]
+    if result.returncode != 0:
+        # Some node is still not installed (e.g. an uninstalled runtime dep): query one by one
+        outputs = [r.stdout for r in map(find, sorted(reachable)) if r.returncode == 0]
+    prefixes = {}
+    for line in "".join(outputs).splitlines():
+        parts = line.split(None, 2)
+        if len(parts) == 3:
+            prefixes[parts[0]] = (parts[1], Path(parts[2]))
+    if not prefixes:
+        sys.exit(f"error: `{spack} find` returned no prefixes for the dependencies of {prefix}")
+    for info in deps.values():
+        info["prefix"] = str(prefixes.get(info["hash"], (None, ""))[1]) or None
+    return root["name"], {"_all": prefixes, **deps}
+
+
+def library_owners(prefix: Path, spack: str) -> tuple[str, dict[str, dict], list[tuple[Path, str]]]:
+    """Return the root name, its direct deps and (prefix, package) pairs for every node."""
+    root, deps = installed_dependencies(prefix, spack)
+    all_prefixes = deps.pop("_all")
+    owners = [(Path(p), name) for name, p in all_prefixes.values() if p and str(p) not in ("/", "/usr")]
+    owners.append((prefix, root))
+    return root, deps, owners
+
+
+class Closure(NamedTuple):
+    """Result of runtime_closure()."""
+
+    #: {owning package: files of the prefix with a DT_NEEDED entry resolving into it}
+    direct: dict[str, set]
+    #: {owning package: dependency libraries with a DT_NEEDED entry resolving into it}
+    transitive: dict[str, set]
+    #: {unresolved name: loading files}
+    missing: dict[str, set]
+    #: {unresolved driver-provided name: loading files}
+    driver_provided: dict[str, set]
+    #: {resolved library outside root and system: DT_NEEDED names used for it}
+    libraries: dict[Path, set]
+
+
+def runtime_closure(
+    files: list[Path],
+    owners: list[tuple[Path, str]],
+    root: str,
+    ld_library_path: list[str] | None = None,
+) -> Closure:
+    """
+    Resolve the DT_NEEDED entries of ``files`` transitively, as ld.so would.
+
+    ``ld_library_path`` defaults to this process's LD_LIBRARY_PATH. DT_RPATH
+    is inherited from loaders, and sonames already loaded by the loaders are
+    reused, along the first chain that reaches an object. That is the usual
+    case, but it is an approximation of what ld.so does for each process.
+    """
+    if ld_library_path is None:
+        ld_library_path = [d for d in os.environ.get("LD_LIBRARY_PATH", "").split(":") if d]
+    in_prefix = set(files)
+
+    def owner_of(path: str) -> str:
+        for p, name in owners:
+            if path.startswith(str(p) + os.sep):
+                return name
+        return "system"
+
+    closure = Closure(
+        defaultdict(set), defaultdict(set), defaultdict(set), defaultdict(set), defaultdict(set)
+    )
+    # Each entry: (file, DT_RPATH lists of the loaders, sonames loaded by the loaders)
+    queue = [(f, [], {}) for f in files]
+    seen = set(files)
+    while queue:
+        elf, inherited_rpaths, loaded = queue.pop()
+        dynamic = dynamic_section(elf)
+        if dynamic.runpath:
+            search = [*ld_library_path, *dynamic.runpath]
+        else:
+            search = [*dynamic.rpath, *(d for rpath in inherited_rpaths for d in rpath), *ld_library_path]
+        search += SYSTEM_DIRS
+
+        resolved_here = {}
+        for name in dynamic.needed:
+            resolved = loaded.get(name)
+            if resolved is None:
+                for d in search:
+                    candidate = os.path.join(d, name)
+                    if os.path.exists(candidate):
+                        resolved = Path(os.path.realpath(candidate))
+                        break
+            if resolved is None:
+                target = closure.driver_provided if name in DRIVER_PROVIDED else closure.missing
+                target[name].add(str(elf))
+                continue
+            resolved_here[name] = resolved
+            owner = owner_of(str(resolved))
+            (closure.direct if elf in in_prefix else closure.transitive)[owner].add(str(elf))
+            if owner not in ("system", root):
+                closure.libraries[resolved].add(name)
+
+        child_rpaths = inherited_rpaths if dynamic.runpath else [dynamic.rpath, *inherited_rpaths]
+        child_loaded = {**loaded, **resolved_here}
+        for resolved in resolved_here.values():
+            if resolved not in seen and owner_of(str(resolved)) not in ("system", root):
+                seen.add(resolved)
+                queue.append((resolved, child_rpaths, child_loaded))
+    return closure
+
+
+def main():
+    """Print the closure report as JSON; exit 1 if any DT_NEEDED entry is unresolved."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("prefix", type=Path, help="installed Spack prefix (with .spack/spec.json)")
+    parser.add_argument("--spack", default="spack", help="spack executable (default: %(default)s)")
+    parser.add_argument("--allow", action="append", default=[], help="dependency expected to be unused")
+    parser.add_argument("--verbose", action="store_true", help="list the loading files per dependency")
+    args = parser.parse_args()
+
+    root, deps, owners = library_owners(args.prefix, args.spack)
+    files = elf_files(args.prefix)
+    closure = runtime_closure(files, owners, root)
+
+    direct = {}
+    for name, info in sorted(deps.items()):
+        if not {"link", "run"} & set(info["deptypes"]):
+            continue
+        users = sorted(closure.direct.get(name, ()))
+        via = sorted(closure.transitive.get(name, ()))
+        direct[name] = {
+            "deptypes": info["deptypes"],
+            "loaded_directly_by": len(users),
+            "loaded_transitively_by": len(via),
+        }
+        if args.verbose:
+            direct[name]["files"] = users
+            direct[name]["via"] = via
+
+    not_direct = [n for n, d in direct.items() if not d["loaded_directly_by"]]
+    report = {
+        "prefix": str(args.prefix),
+        "package": root,
+        "elf_files_scanned": len(files) + len(closure.libraries),
+        "dependencies": direct,
+        "unused": [n for n in not_direct if n not in args.allow],
+        "transitive_only": [n for n in not_direct if direct[n]["loaded_transitively_by"]],
+        "allowed_unused": [n for n in args.allow if n in not_direct],
+        "missing": {name: sorted(f) for name, f in sorted(closure.missing.items())},
+        "driver_provided": {name: sorted(f) for name, f in sorted(closure.driver_provided.items())},
+    }
+    print(json.dumps(report, indent=2))
+    return 1 if closure.missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
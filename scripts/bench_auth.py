@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Compare RPC authentication overhead of auth/munge and auth/slurm.
+
+Both plugins run against the same auth=both install (--prefix), one after
+the other, on a one-node loopback cluster. For auth/munge, a private
+munged is started with a generated key and its own socket
+(AuthInfo=socket=...). Each of --clients concurrent scontrol processes reads
+--rpcs commands from stdin, so process startup is paid once per client
+rather than once per RPC. Every command is a real, authenticated RPC to
+slurmctld.
+
+The run fails if any scontrol exits non-zero or if slurmctld's sdiag
+counted fewer than 95% of the clients*rpcs RPCs, so a broken
+authentication setup cannot report fast, empty runs. The report gives:
+- RPCs per second and mean client-side latency
+- slurmctld's own per-message-type RPC times from sdiag
+- the CPU seconds slurmctld and munged used during the run
+All figures are also given as ratios of auth/slurm against auth/munge.
+
+    ./scripts/bench_auth.py --prefix $(spack location -i slurm_factory.slurm auth=both) \
+        --munge-prefix $(spack location -i munge)
+"""
+
+import argparse
+import json
+import os
+import re
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loopback_cluster import LoopbackCluster
+
+COMMANDS = ("ping", "show partition", "show node")
+#: Fraction of the issued RPCs that sdiag must have counted for the run to be reported
+MIN_COUNTED = 0.95
+SDIAG_RPC_RE = re.compile(r"^\s*(REQUEST_\w+|MESSAGE_\w+)\s+\(\s*\d+\)\s+count:(\d+)\s+ave_time:(\d+)")
+
+
+def cpu_seconds(pid: int) -> float:
+    """Return user+system CPU seconds consumed so far by ``pid``."""
+    fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_munged(munge_prefix: Path, workdir: Path) -> tuple[subprocess.Popen, Path]:
+    """Start a private munged with a fresh key; return the process and its socket."""
+    workdir.mkdir(parents=True)
+    workdir.chmod(0o700)
+    key = workdir / "munge.key"
+    key.write_bytes(secrets.token_bytes(1024))
+    key.chmod(0o600)
+    socket = workdir / "munge.socket"
+    proc = subprocess.Popen(
+        [
+            str(munge_prefix / "sbin" / "munged"),
+            "--foreground",
+            "--force",
+            f"--socket={socket}",
+            f"--key-file={key}",
+            f"--pid-file={workdir / 'munged.pid'}",
+            f"--log-file={workdir / 'munged.log'}",
+            f"--seed-file={workdir / 'munged.seed'}",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while not socket.exists():
+        if proc.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError(f"munged did not start; see {workdir / 'munged.log'}")
+        time.sleep(0.1)
+    return proc, socket
+
+
+def sdiag_rpcs(cluster: LoopbackCluster) -> dict[str, dict[str, int]]:
+    """Return {message type: {count, ave_time_us}} from sdiag's RPC statistics."""
+    rpcs = {}
+    for line in cluster.run("sdiag", check=False).splitlines():
+        match = SDIAG_RPC_RE.match(line)
+        if match:
+            rpcs[match.group(1)] = {"count": int(match.group(2)), "ave_time_us": int(match.group(3))}
+    return rpcs
+
+
+def run_clients(cluster: LoopbackCluster, clients: int, rpcs: int) -> float:
+    """
+    Run ``clients`` scontrol processes with ``rpcs`` commands each; return elapsed seconds.
+
+    Raises RuntimeError if any scontrol exits non-zero, e.g. because
+    authentication failed and no RPC reached slurmctld.
+    """
+    script = "".join(f"{COMMANDS[i % len(COMMANDS)]}\n" for i in range(rpcs)) + "quit\n"
+
+    def client(_):
+        return subprocess.run(
+            [cluster.command("scontrol")],
+            input=script,
+            env=cluster.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+    failed = [r for r in results if r.returncode != 0]
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} of {clients} scontrol clients failed (exit {failed[0].returncode}): "
+            f"{failed[0].stderr.strip()[-500:]}"
+        )
+    return elapsed
+
+
+def bench_auth(auth: str, args: argparse.Namespace, workdir: Path) -> dict:
+    """Measure one authentication plugin on a fresh loopback cluster."""
+    munged, extra_conf = None, {}
+    if auth == "munge":
+        munged, socket = start_munged(args.munge_prefix, workdir / "munge")
+        extra_conf = {
+            "AuthType": "auth/munge",
+            "CredType": "cred/munge",
+            "AuthInfo": f"socket={socket}",
+        }
+    try:
+        cluster = LoopbackCluster(args.prefix, workdir / "cluster", nodes=1, extra_conf=extra_conf)
+        with cluster:
+            # Warm up connections and plugin state before measuring
+            run_clients(cluster, 1, 10)
+            cluster.run("sdiag", "--reset", check=False)
+            ctld_cpu = cpu_seconds(cluster.slurmctld.pid)
+            munged_cpu = cpu_seconds(munged.pid) if munged else 0.0
+            seconds = run_clients(cluster, args.clients, args.rpcs)
+            ctld_cpu = cpu_seconds(cluster.slurmctld.pid) - ctld_cpu
+            munged_cpu = cpu_seconds(munged.pid) - munged_cpu if munged else 0.0
+            rpcs = sdiag_rpcs(cluster)
+    finally:
+        if munged:
+            munged.terminate()
+            munged.wait(timeout=30)
+
+    total = args.clients * args.rpcs
+    counted = sum(entry["count"] for entry in rpcs.values())
+    if counted < MIN_COUNTED * total:
+        raise RuntimeError(f"auth/{auth}: slurmctld counted {counted} RPCs, expected about {total}")
+    return {
+        "auth": f"auth/{auth}",
+        "rpcs": total,
+        "slurmctld_rpcs_counted": counted,
+        "seconds": round(seconds, 3),
+        "rpcs_per_second": round(total / seconds, 1),
+        "mean_latency_us": round(seconds * args.clients / total * 1e6, 1),
+        "slurmctld_cpu_seconds": round(ctld_cpu, 3),
+        "munged_cpu_seconds": round(munged_cpu, 3),
+        "slurmctld_rpc_stats": rpcs,
+    }
+
+
+def main():
+    """Benchmark each --auth plugin and print the results and auth/slurm vs auth/munge ratios as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--prefix", required=True, type=Path, help="Slurm prefix built with auth=both")
+    parser.add_argument("--munge-prefix", type=Path, help="munge install prefix (for munged)")
+    parser.add_argument(
+        "--auth", action="append", choices=("munge", "slurm"), help="plugins to run (default: both)"
+    )
+    parser.add_argument("--clients", type=int, default=16, help="concurrent scontrol processes")
+    parser.add_argument("--rpcs", type=int, default=2000, help="RPCs per client")
+    args = parser.parse_args()
+    args.auth = args.auth or ["munge", "slurm"]
+
+    for auth in args.auth:
+        plugin = args.prefix / "lib" / "slurm" / f"auth_{auth}.so"
+        if not plugin.exists():
+            parser.error(f"{plugin} not found; build Slurm with auth=both")
+    if "munge" in args.auth and not args.munge_prefix:
+        parser.error("--munge-prefix is required for auth/munge")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="auth-bench-") as tmp:
+        for auth in args.auth:
+            results[auth] = bench_auth(auth, args, Path(tmp) / auth)
+
+    report = {"prefix": str(args.prefix), "results": list(results.values())}
+    if {"munge", "slurm"} <= results.keys():
+        munge, slurm = results["munge"], results["slurm"]
+        report["slurm_vs_munge"] = {
+            "rpcs_per_second": round(slurm["rpcs_per_second"] / munge["rpcs_per_second"], 3),
+            "mean_latency": round(slurm["mean_latency_us"] / munge["mean_latency_us"], 3),
+            "cpu_seconds": round(
+                slurm["slurmctld_cpu_seconds"]
+                / max(munge["slurmctld_cpu_seconds"] + munge["munged_cpu_seconds"], 1e-9),
+                3,
+            ),
+        }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
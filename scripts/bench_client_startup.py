@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Measure client command startup for shared vs. static libslurm builds.
+
+For every --prefix (e.g. a default build and a ~shared_libslurm build),
+each --command is timed --runs times in two ways. ``--version`` covers
+exec, the dynamic loader and relocation but reads no slurm.conf. The query
+form (squeue -h, sinfo -h, scontrol show partition, sacct -n -X) runs
+against a one-node loopback cluster, the way monitoring agents call it.
+sacct exits quickly with accounting storage disabled, but it still pays
+the full startup.
+
+glibc's LD_DEBUG=statistics reports the loader's own work for each command:
+startup cycles, symbol and relative relocations, and the number of
+objects loaded. All results after the first prefix are also reported as
+ratios against it:
+
+    ./scripts/bench_client_startup.py --prefix $(spack location -i slurm_factory.slurm+shared_libslurm) \
+        --prefix $(spack location -i slurm_factory.slurm~shared_libslurm)
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loopback_cluster import LoopbackCluster
+
+QUERIES = {
+    "squeue": ["-h"],
+    "sinfo": ["-h"],
+    "scontrol": ["show", "partition"],
+    "sacct": ["-n", "-X"],
+}
+STAT_RE = {
+    "loader_cycles": re.compile(r"total startup time in dynamic loader:\s+(\d+)"),
+    "relocations": re.compile(r"number of relocations:\s+(\d+)"),
+    "relative_relocations": re.compile(r"number of relative relocations:\s+(\d+)"),
+    "objects_loaded": re.compile(r"number of (?:loaded objects|objects loaded)[^:]*:\s+(\d+)"),
+}
+
+
+def time_runs(argv: list[str], env: dict, runs: int) -> dict:
+    """Run ``argv`` ``runs`` times and return median and p95 wall time in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(0.95 * (len(samples) - 1))], 3),
+    }
+
+
+def loader_stats(argv: list[str], env: dict) -> dict:
+    """Return the LD_DEBUG=statistics counters for one run of ``argv``."""
+    result = subprocess.run(
+        argv,
+        env={**env, "LD_DEBUG": "statistics"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    stats = {}
+    for key, pattern in STAT_RE.items():
+        # The loader prints the block again at exit; the first one is startup
+        match = pattern.search(result.stderr)
+        if match:
+            stats[key] = int(match.group(1))
+    return stats
+
+
+def links_libslurmfull(path: str) -> bool:
+    """Return True if ``path`` has libslurmfull in its DT_NEEDED entries."""
+    output = subprocess.run(["readelf", "-d", "-W", path], capture_output=True, text=True).stdout
+    return "libslurmfull" in output
+
+
+def bench_prefix(prefix: Path, workdir: Path, args: argparse.Namespace) -> dict:
+    """Time every command of one prefix, standalone and against a loopback cluster."""
+    cluster = LoopbackCluster(prefix, workdir, nodes=1)
+    results = {"prefix": str(prefix), "commands": {}}
+    with cluster:
+        for name in args.command:
+            binary = cluster.command(name)
+            version_argv = [binary, "--version"]
+            query_argv = [binary, *QUERIES.get(name, [])]
+            results["commands"][name] = {
+                "links_libslurmfull": links_libslurmfull(binary),
+                "binary_bytes": Path(binary).stat().st_size,
+                "version": time_runs(version_argv, cluster.env, args.runs),
+                "query": time_runs(query_argv, cluster.env, args.runs),
+                "loader": loader_stats(version_argv, cluster.env),
+            }
+    return results
+
+
+def compare(base: dict, other: dict) -> dict:
+    """Return other/base ratios of the median times and loader counters per command."""
+    ratios = {}
+    for name, entry in other["commands"].items():
+        ref = base["commands"].get(name)
+        if not ref:
+            continue
+        ratios[name] = {
+            f"{kind}_median": round(entry[kind]["median_ms"] / ref[kind]["median_ms"], 3)
+            for kind in ("version", "query")
+            if ref[kind]["median_ms"]
+        }
+        for key, value in entry["loader"].items():
+            if ref["loader"].get(key):
+                ratios[name][key] = round(value / ref["loader"][key], 3)
+    return ratios
+
+
+def main():
+    """Benchmark every prefix and print the results, with ratios against the first, as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--prefix", action="append", required=True, type=Path, help="Slurm install prefix")
+    parser.add_argument(
+        "--command", action="append", choices=sorted(QUERIES), help="commands to time (default: all)"
+    )
+    parser.add_argument("--runs", type=int, default=200, help="runs per command and form")
+    args = parser.parse_args()
+    args.command = args.command or list(QUERIES)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="client-startup-bench-") as tmp:
+        for i, prefix in enumerate(args.prefix):
+            results.append(bench_prefix(prefix, Path(tmp) / str(i), args))
+
+    for other in results[1:]:
+        other["relative_to_first"] = compare(results[0], other)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Time concretization of the repo's Slurm specs and compare against a baseline.
+
+Builds the matrix of Slurm versions (read from the recipe) x variant sets x
+compilers, runs ``spack solve --timers --stats`` for each spec and records
+wall time, the solver phase timers and clingo statistics. Everything runs
+offline against local package metadata. With --baseline, exits non-zero when
+a spec's median solve time exceeds the baseline by more than --max-ratio;
+--update-baseline writes the current results as the new baseline.
+"""
+
+import argparse
+import itertools
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+SLURM_RECIPE = REPO_ROOT / "spack_repo" / "slurm_factory" / "packages" / "slurm" / "package.py"
+
+DEFAULT_VARIANTS = [
+    "",
+    "+nvml",
+    "+rsmi",
+    "sysconfdir=/etc/slurm build_profile=perf",
+]
+
+TIMER_RE = re.compile(r"^\s*(setup|load|ground|solve|construct_specs|total)\s+([\d.]+)s\s*$")
+STAT_RE = re.compile(
+    r"^\s*(Choices|Conflicts|Restarts|Atoms|Rules|Bodies|Equivalences|Variables|Constraints)\b\s*:\s*(\d+)"
+)
+
+
+def slurm_versions() -> list[str]:
+    """Return the versions declared in the Slurm recipe."""
+    return re.findall(r'^\s*version\("([^"]+)"', SLURM_RECIPE.read_text(), flags=re.MULTILINE)
+
+
+def solve(spack: str, spec: str) -> tuple[float, dict[str, float], dict[str, int]]:
+    """Concretize ``spec`` once; return wall seconds, phase timers and solver statistics."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [spack, "solve", "--timers", "--stats", spec], check=True, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+
+    timers, stats = {}, {}
+    for line in result.stdout.splitlines():
+        if match := TIMER_RE.match(line):
+            timers[match.group(1)] = float(match.group(2))
+        elif match := STAT_RE.match(line):
+            stats[match.group(1).lower()] = int(match.group(2))
+    return wall, timers, stats
+
+
+def main():
+    """Run the matrix and print (or store) the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spack", default="spack", help="spack executable (default: %(default)s)")
+    parser.add_argument("--slurm-version", action="append", help="Slurm version (default: all in the recipe)")
+    parser.add_argument("--variants", action="append", help="variant string (repeatable)")
+    parser.add_argument("--compiler", action="append", help="compiler spec, e.g. gcc@13 (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="solves per spec; the median is reported")
+    parser.add_argument("--baseline", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--max-ratio", type=float, default=1.5, help="allowed slowdown vs. baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="write results to --baseline")
+    args = parser.parse_args()
+
+    versions = args.slurm_version or slurm_versions()
+    variant_sets = args.variants or DEFAULT_VARIANTS
+    compilers = args.compiler or [""]
+
+    results = {}
+    for ver, variants, compiler in itertools.product(versions, variant_sets, compilers):
+        spec = " ".join(
+            p for p in (f"slurm_factory.slurm@{ver}", variants, f"%{compiler}" if compiler else "") if p
+        )
+        runs = [solve(args.spack, spec) for _ in range(args.repeat)]
+        walls = [r[0] for r in runs]
+        results[spec] = {
+            "median_seconds": round(statistics.median(walls), 3),
+            "min_seconds": round(min(walls), 3),
+            "timers": runs[-1][1],
+            "stats": runs[-1][2],
+        }
+        print(f"{spec}: {results[spec]['median_seconds']}s", file=sys.stderr)
+
+    regressions = {}
+    if args.baseline and args.baseline.exists() and not args.update_baseline:
+        baseline = json.loads(args.baseline.read_text())
+        for spec, result in results.items():
+            if spec not in baseline:
+                continue
+            ratio = result["median_seconds"] / max(baseline[spec]["median_seconds"], 1e-6)
+            result["baseline_ratio"] = round(ratio, 2)
+            if ratio > args.max_ratio:
+                regressions[spec] = result["baseline_ratio"]
+
+    if args.update_baseline:
+        if not args.baseline:
+            parser.error("--update-baseline requires --baseline")
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+
+    print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
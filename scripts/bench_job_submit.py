@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Measure job_submit/lua plugin calls per second inside slurmctld.
+
+For every --prefix, submits the same burst of held batch jobs to a loopback
+cluster twice: once without a job_submit plugin and once with
+JobSubmitPlugins=lua. In the second run, job_submit.lua loads the site
+script (--script, or a bundled example with partition routing, defaults and
+string handling) and calls its slurm_job_submit() --calls-per-job times on
+the real job descriptor. This amplifies the plugin cost above the sbatch
+round trip. The extra submit time divided by the number of calls gives
+plugin calls per second, so lua=lua and lua=luajit builds can be compared:
+
+    ./scripts/bench_job_submit.py \
+        --prefix $(spack location -i slurm_factory.slurm lua=lua) \
+        --prefix $(spack location -i slurm_factory.slurm lua=luajit) \
+        --script /etc/slurm/job_submit.lua
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loopback_cluster import LoopbackCluster
+
+EXAMPLE_SITE_SCRIPT = """
+-- Example site logic: route by job name, apply defaults, tag the job.
+local routes = {}
+for i = 1, 200 do
+    routes[string.format("project%03d", i)] = { partition = "bench", limit = 30 + i % 90 }
+end
+
+function slurm_job_submit(job_desc, part_list, submit_uid)
+    local name = job_desc.name or "batch"
+    local project = string.match(name, "^(project%d+)") or "project001"
+    local route = routes[project] or routes["project001"]
+    if job_desc.partition == nil then
+        job_desc.partition = route.partition
+    end
+    if job_desc.time_limit == nil or job_desc.time_limit == slurm.NO_VAL then
+        job_desc.time_limit = route.limit
+    end
+    local words = {}
+    for word in string.gmatch(string.lower(name), "%a+") do
+        words[#words + 1] = word
+    end
+    local tags = table.concat(words, ",")
+    job_desc.comment = string.format("uid=%d project=%s tags=%s", submit_uid, project, tags)
+    return slurm.SUCCESS
+end
+
+function slurm_job_modify(job_desc, job_rec, part_list, modify_uid)
+    return slurm.SUCCESS
+end
+"""
+
+WRAPPER = """
+-- Generated by bench_job_submit.py: run the site logic {calls} times per job.
+dofile("{site}")
+local site_submit = slurm_job_submit
+
+function slurm_job_submit(job_desc, part_list, submit_uid)
+    for _ = 2, {calls} do
+        site_submit(job_desc, part_list, submit_uid)
+    end
+    return site_submit(job_desc, part_list, submit_uid)
+end
+"""
+
+
+def lua_flavor(prefix: Path) -> str:
+    """Return which Lua library the job_submit/lua plugin is linked against."""
+    plugin = prefix / "lib" / "slurm" / "job_submit_lua.so"
+    if not plugin.exists():
+        return "missing"
+    output = subprocess.run(["ldd", str(plugin)], capture_output=True, text=True).stdout
+    return "luajit" if "libluajit" in output else "lua"
+
+
+def submit_burst(cluster: LoopbackCluster, args: argparse.Namespace) -> float:
+    """Submit --jobs held batch jobs concurrently and return the elapsed seconds."""
+    cmd = ["sbatch", "--parsable", "--hold", "-J", "project042-bench", "-o", "/dev/null", "--wrap", "true"]
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda _: cluster.run(*cmd), range(args.jobs)))
+    return time.monotonic() - start
+
+
+def bench_prefix(prefix: Path, workdir: Path, site_script: str, args: argparse.Namespace) -> dict:
+    """Measure submit time without and with the Lua plugin for one prefix."""
+    baseline = LoopbackCluster(prefix, workdir / "baseline", nodes=1)
+    with baseline:
+        baseline_seconds = submit_burst(baseline, args)
+
+    etc = workdir / "lua" / "etc"
+    files = {
+        "job_submit_site.lua": site_script,
+        "job_submit.lua": WRAPPER.format(calls=args.calls_per_job, site=etc / "job_submit_site.lua"),
+    }
+    cluster = LoopbackCluster(
+        prefix, workdir / "lua", nodes=1, extra_conf={"JobSubmitPlugins": "lua"}, extra_files=files
+    )
+    with cluster:
+        lua_seconds = submit_burst(cluster, args)
+
+    calls = args.jobs * args.calls_per_job
+    plugin_seconds = lua_seconds - baseline_seconds
+    # Plugin overhead lost in the run-to-run noise: no meaningful rate
+    measurable = plugin_seconds > 0
+    return {
+        "prefix": str(prefix),
+        "lua": lua_flavor(prefix),
+        "jobs": args.jobs,
+        "plugin_calls": calls,
+        "baseline_submit_seconds": round(baseline_seconds, 3),
+        "lua_submit_seconds": round(lua_seconds, 3),
+        "plugin_calls_per_second": round(calls / plugin_seconds, 1) if measurable else None,
+        "plugin_microseconds_per_call": round(plugin_seconds / calls * 1e6, 2) if measurable else None,
+    }
+
+
+def main():
+    """Benchmark every given prefix and print the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--prefix", action="append", required=True, type=Path, help="Slurm install prefix")
+    parser.add_argument("--script", type=Path, help="site job_submit.lua (default: bundled example)")
+    parser.add_argument("--jobs", type=int, default=500, help="jobs submitted per run")
+    parser.add_argument("--calls-per-job", type=int, default=200, help="slurm_job_submit() calls per job")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel sbatch clients")
+    args = parser.parse_args()
+
+    site_script = args.script.read_text() if args.script else EXAMPLE_SITE_SCRIPT
+    results = []
+    with tempfile.TemporaryDirectory(prefix="job-submit-bench-") as tmp:
+        for i, prefix in enumerate(args.prefix):
+            results.append(bench_prefix(prefix, Path(tmp) / str(i), site_script, args))
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
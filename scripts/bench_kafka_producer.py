@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Measure librdkafka producer throughput for jobcomp-sized events.
+
+Compiles a small producer against the given librdkafka prefix (linking
+librdkafka.a like the jobcomp/kafka plugin does) and runs it against
+librdkafka's in-process mock cluster (test.mock.num.brokers), so no Kafka
+brokers or network are needed. Every --codec x --linger-ms combination sends
+--messages JSON job records of about 1 KiB. For each run the benchmark
+reports enqueue and end-to-end rates, how often the local queue was full (the
+point where slurmctld would stall), the time spent waiting on it, and bytes
+on the wire vs. message bytes:
+
+    ./scripts/bench_kafka_producer.py --rdkafka-prefix $(spack location -i slurm_factory.librdkafka) \
+        --codec none --codec lz4 --codec zstd --linger-ms 0 --linger-ms 5
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PRODUCER = r"""
+#include <librdkafka/rdkafka.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+static long delivered, failed, tx_bytes, txmsg_bytes;
+
+static double now(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static void dr_cb(rd_kafka_t *rk, const rd_kafka_message_t *m, void *opaque)
+{
+    if (m->err)
+        failed++;
+    else
+        delivered++;
+}
+
+static long stat_field(const char *json, const char *key)
+{
+    const char *p = strstr(json, key);
+    return p ? atol(p + strlen(key)) : 0;
+}
+
+static int stats_cb(rd_kafka_t *rk, char *json, size_t len, void *opaque)
+{
+    tx_bytes = stat_field(json, "\"tx_bytes\":");
+    txmsg_bytes = stat_field(json, "\"txmsg_bytes\":");
+    return 0;
+}
+
+static void set(rd_kafka_conf_t *conf, const char *key, const char *value)
+{
+    char errstr[512];
+
+    if (rd_kafka_conf_set(conf, key, value, errstr, sizeof(errstr)) != RD_KAFKA_CONF_OK) {
+        fprintf(stderr, "%s: %s\n", key, errstr);
+        exit(1);
+    }
+}
+
+int main(int argc, char **argv)
+{
+    long messages = atol(argv[1]), i, queue_full = 0;
+    rd_kafka_conf_t *conf = rd_kafka_conf_new();
+    rd_kafka_resp_err_t err;
+    char errstr[512], payload[1200];
+    double start, enqueued, total, stalled = 0, t;
+    rd_kafka_t *rk;
+    int len;
+
+    set(conf, "test.mock.num.brokers", "3");
+    set(conf, "compression.codec", argv[2]);
+    set(conf, "linger.ms", argv[3]);
+    set(conf, "batch.num.messages", argv[4]);
+    set(conf, "queue.buffering.max.messages", argv[5]);
+    set(conf, "statistics.interval.ms", "100");
+    rd_kafka_conf_set_dr_msg_cb(conf, dr_cb);
+    rd_kafka_conf_set_stats_cb(conf, stats_cb);
+
+    if (!(rk = rd_kafka_new(RD_KAFKA_PRODUCER, conf, errstr, sizeof(errstr)))) {
+        fprintf(stderr, "rd_kafka_new: %s\n", errstr);
+        return 1;
+    }
+
+    start = now();
+    for (i = 0; i < messages; i++) {
+        len = snprintf(payload, sizeof(payload),
+            "{\"jobid\":%ld,\"user\":\"user%03ld\",\"account\":\"proj%02ld\","
+            "\"partition\":\"batch\",\"state\":\"COMPLETED\",\"exit_code\":0,"
+            "\"nodes\":\"node[%04ld-%04ld]\",\"cpus\":%ld,\"time_limit\":1440,"
+            "\"submit_time\":%ld,\"start_time\":%ld,\"end_time\":%ld,"
+            "\"work_dir\":\"/home/user%03ld/projects/simulation/run%05ld\","
+            "\"std_out\":\"/home/user%03ld/projects/simulation/run%05ld/slurm-%ld.out\","
+            "\"tres_alloc\":\"cpu=%ld,mem=%ldM,node=2,billing=%ld\","
+            "\"comment\":\"%.*s\"}",
+            i, i % 500, i % 40, i % 1000, i % 1000 + 1, 32 + i % 96,
+            1700000000 + i, 1700000060 + i, 1700003600 + i,
+            i % 500, i, i % 500, i, i, 32 + i % 96, 4096 * (1 + i % 8), 32 + i % 96,
+            (int)(i % 400), "site-specific job comment text repeated to pad the record to a "
+            "realistic size for jobcomp/kafka events produced by slurmctld at the end of each "
+            "job, including the accounting fields and paths above, plus some more words to "
+            "reach roughly one kilobyte of payload per message in this benchmark run");
+        if (len >= (int)sizeof(payload))
+            len = sizeof(payload) - 1;
+retry:
+        err = rd_kafka_producev(rk, RD_KAFKA_V_TOPIC("jobcomp"),
+                                RD_KAFKA_V_MSGFLAGS(RD_KAFKA_MSG_F_COPY),
+                                RD_KAFKA_V_VALUE(payload, len), RD_KAFKA_V_END);
+        if (err == RD_KAFKA_RESP_ERR__QUEUE_FULL) {
+            queue_full++;
+            t = now();
+            rd_kafka_poll(rk, 10);
+            stalled += now() - t;
+            goto retry;
+        } else if (err) {
+            fprintf(stderr, "produce: %s\n", rd_kafka_err2str(err));
+            return 1;
+        }
+        rd_kafka_poll(rk, 0);
+    }
+    enqueued = now() - start;
+    rd_kafka_flush(rk, 120000);
+    total = now() - start;
+    rd_kafka_poll(rk, 250);
+
+    printf("enqueue_seconds=%f\ntotal_seconds=%f\ndelivered=%ld\nfailed=%ld\n", enqueued, total,
+           delivered, failed);
+    printf("queue_full=%ld\nstall_seconds=%f\ntx_bytes=%ld\ntxmsg_bytes=%ld\n", queue_full, stalled,
+           tx_bytes, txmsg_bytes);
+    rd_kafka_destroy(rk);
+    return 0;
+}
+"""
+
+
+def build_producer(prefix: Path, workdir: Path, extra_libs: list[str]) -> Path:
+    """Compile the producer against ``prefix``, statically if librdkafka.a is installed."""
+    source = workdir / "producer.c"
+    binary = workdir / "producer"
+    source.write_text(PRODUCER)
+    libdir = next(d for d in (prefix / "lib", prefix / "lib64") if d.is_dir())
+    archive = libdir / "librdkafka.a"
+    if archive.exists():
+        rdkafka = [str(archive), *extra_libs]
+    else:
+        rdkafka = [f"-L{libdir}", f"-Wl,-rpath,{libdir}", "-lrdkafka"]
+    subprocess.run(
+        [
+            os.environ.get("CC", "cc"),
+            "-O2",
+            f"-I{prefix / 'include'}",
+            str(source),
+            "-o",
+            str(binary),
+            *rdkafka,
+            "-lpthread",
+            "-lm",
+            "-ldl",
+        ],
+        check=True,
+    )
+    return binary
+
+
+def run_producer(binary: Path, codec: str, linger_ms: int, args: argparse.Namespace) -> dict:
+    """Run one producer configuration and return its metrics."""
+    output = subprocess.run(
+        [binary, str(args.messages), codec, str(linger_ms), str(args.batch), str(args.queue_max)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    raw = {key: float(value) for key, _, value in (line.partition("=") for line in output.splitlines())}
+    return {
+        "codec": codec,
+        "linger_ms": linger_ms,
+        "enqueue_msgs_per_second": round(args.messages / raw["enqueue_seconds"], 1),
+        "delivered_msgs_per_second": round(raw["delivered"] / raw["total_seconds"], 1),
+        "failed": int(raw["failed"]),
+        "queue_full_events": int(raw["queue_full"]),
+        "queue_full_stall_seconds": round(raw["stall_seconds"], 4),
+        "wire_bytes_per_message": round(raw["tx_bytes"] / max(raw["delivered"], 1), 1),
+        "compression_ratio": round(raw["txmsg_bytes"] / raw["tx_bytes"], 2) if raw["tx_bytes"] else None,
+    }
+
+
+def main():
+    """Run every codec/linger combination and print the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rdkafka-prefix", required=True, type=Path, help="librdkafka install prefix")
+    parser.add_argument("--codec", action="append", help="compression.codec (default: none, lz4, zstd)")
+    parser.add_argument("--linger-ms", action="append", type=int, help="linger.ms values (default: 0, 5)")
+    parser.add_argument("--messages", type=int, default=200000, help="messages per run")
+    parser.add_argument("--batch", type=int, default=10000, help="batch.num.messages")
+    parser.add_argument(
+        "--queue-max", type=int, default=10000, help="queue.buffering.max.messages (smaller = earlier stalls)"
+    )
+    parser.add_argument(
+        "--libs",
+        default="-lzstd -llz4 -lssl -lcrypto",
+        help="libraries librdkafka.a needs (add -L flags for non-system installs)",
+    )
+    args = parser.parse_args()
+
+    results = {"rdkafka_prefix": str(args.rdkafka_prefix), "messages": args.messages, "runs": []}
+    with tempfile.TemporaryDirectory(prefix="kafka-bench-") as tmp:
+        binary = build_producer(args.rdkafka_prefix, Path(tmp), args.libs.split())
+        for codec, linger in itertools.product(
+            args.codec or ["none", "lz4", "zstd"], args.linger_ms or [0, 5]
+        ):
+            results["runs"].append(run_producer(binary, codec, linger, args))
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Compare build times of the link-heavy recipes across linker=default|mold|lld.
+
+Installs ``<spec> linker==<linker>`` once per --linker, propagating the
+variant to curl, openssl and s2n-tls, from source only so every package is
+actually built. It then reads Spack's per-phase build telemetry
+(.spack/install_times.json) for each package in --package. Compile work is
+identical between the builds, so the difference in the build and install
+phases is the link time saved. Slurm's manual libslurm_curl link is timed
+separately and taken from the build log. Reports are relative to the first
+--linker:
+
+    ./scripts/bench_linker.py --spec "slurm_factory.slurm@25-11-6-1" \
+        --linker default --linker mold --linker lld
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from analyze_runtime_closure import installed_dependencies
+
+LINK_PHASES = ("build", "install")
+MANUAL_LINK_RE = re.compile(r"Linked libslurm_curl\.so with linker=\S+ in ([\d.]+)s")
+
+
+def install(spack: str, spec: str, jobs: int) -> Path:
+    """Build ``spec`` from source (no-op if already installed) and return its prefix."""
+    subprocess.run([spack, "install", "--no-cache", "-j", str(jobs), spec], check=True)
+    output = subprocess.run([spack, "location", "-i", spec], check=True, capture_output=True, text=True)
+    return Path(output.stdout.strip())
+
+
+def phase_times(prefix: Path) -> dict[str, float]:
+    """Return {phase: seconds} and the total from <prefix>/.spack/install_times.json."""
+    data = json.loads((prefix / ".spack" / "install_times.json").read_text())
+    times = {}
+    for phase in data.get("phases", []):
+        # Nested timers have a path such as "phases/build"; keep the top-level phases
+        if phase.get("path", f"phases/{phase['name']}").count("/") <= 1:
+            times[phase["name"]] = round(times.get(phase["name"], 0.0) + phase["seconds"], 2)
+    times["total"] = round(data.get("total", {}).get("seconds", sum(times.values())), 2)
+    return times
+
+
+def manual_link_seconds(prefix: Path) -> float | None:
+    """Return the libslurm_curl link time recorded in the Slurm build log, if any."""
+    log = prefix / ".spack" / "spack-build-out.txt"
+    if not log.exists():
+        return None
+    match = MANUAL_LINK_RE.search(log.read_text(errors="replace"))
+    return float(match.group(1)) if match else None
+
+
+def main():
+    """Build with every linker and print per-package phase times and savings as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--spec", default="slurm_factory.slurm", help="root spec (default: %(default)s)")
+    parser.add_argument("--linker", action="append", help="linker values (default: default, mold, lld)")
+    parser.add_argument(
+        "--package", action="append", help="packages to report (default: slurm, curl, openssl, s2n-tls)"
+    )
+    parser.add_argument("--jobs", type=int, default=16, help="spack install -j")
+    parser.add_argument("--spack", default="spack", help="spack executable (default: %(default)s)")
+    args = parser.parse_args()
+
+    linkers = args.linker or ["default", "mold", "lld"]
+    packages = args.package or ["slurm", "curl", "openssl", "s2n-tls"]
+
+    results = {}
+    for linker in linkers:
+        root = install(args.spack, f"{args.spec} linker=={linker}", args.jobs)
+        _, deps = installed_dependencies(root, args.spack)
+        prefixes = dict(deps["_all"].values())
+        for name in packages:
+            if name in prefixes:
+                entry = phase_times(prefixes[name])
+                if name == "slurm":
+                    entry["libslurm_curl_link"] = manual_link_seconds(prefixes[name])
+                results.setdefault(name, {})[linker] = entry
+
+    baseline = linkers[0]
+    savings = {}
+    for name, by_linker in results.items():
+        if baseline not in by_linker:
+            continue
+        base = by_linker[baseline]
+        base_link = sum(base.get(p, 0.0) for p in LINK_PHASES)
+        for linker, entry in by_linker.items():
+            if linker == baseline:
+                continue
+            saved = base_link - sum(entry.get(p, 0.0) for p in LINK_PHASES)
+            savings.setdefault(name, {})[linker] = {
+                "build_install_seconds_saved": round(saved, 2),
+                "build_install_percent_saved": round(100 * saved / base_link, 1) if base_link else None,
+                "total_seconds_saved": round(base["total"] - entry["total"], 2),
+            }
+
+    print(
+        json.dumps({"spec": args.spec, "baseline": baseline, "phases": results, "savings": savings}, indent=2)
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
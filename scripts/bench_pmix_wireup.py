@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Time PMIx wireup of a multi-task srun on a loopback cluster.
+
+Compiles a small PMIx client (Put + Commit + Fence with data collection,
+i.e. a full modex) against the given PMIx prefix and launches it with
+``srun --mpi=pmix`` across the emulated nodes, once per mpi.conf mode:
+
+    tcp   PMIxDirectConn=false (modex relayed through srun/slurmd)
+    dc    PMIxDirectConn=true  (direct connections over TCP)
+    ucx   PMIxDirectConn=true PMIxDirectConnUCX=true (needs slurm +ucx)
+
+UCX is restricted to its shm and tcp transports so the run works on any
+single host. Each --gds value (e.g. hash, shmem) is forced on the PMIx
+server and clients through PMIX_MCA_gds, and every rank also fetches the
+job-level data of all peers, which is what gds/shmem speeds up. Reports the
+srun wall time and rank 0's get and fence times per mode:
+
+    ./scripts/bench_pmix_wireup.py --prefix $(spack location -i slurm_factory.slurm+ucx) \
+        --pmix-prefix $(spack location -i pmix) --tasks 64 --gds hash --gds shmem
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loopback_cluster import LoopbackCluster
+
+PMIX_CLIENT = r"""
+#include <pmix.h>
+#include <stdbool.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+#include <time.h>
+
+static double now(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+int main(void)
+{
+    pmix_proc_t me, all, peer;
+    pmix_value_t value, *val;
+    pmix_info_t info;
+    bool collect = true;
+    char payload[256];
+    uint32_t size = 0, r;
+    double start;
+
+    if (PMIx_Init(&me, NULL, 0) != PMIX_SUCCESS)
+        return 1;
+
+    PMIX_PROC_CONSTRUCT(&all);
+    strncpy(all.nspace, me.nspace, PMIX_MAX_NSLEN);
+    all.rank = PMIX_RANK_WILDCARD;
+
+    /* Job-level data: served from shared memory with gds/shmem, copied into
+     * every rank with gds/hash. */
+    start = now();
+    if (PMIx_Get(&all, PMIX_JOB_SIZE, NULL, 0, &val) == PMIX_SUCCESS) {
+        size = val->data.uint32;
+        PMIX_VALUE_RELEASE(val);
+    }
+    for (r = 0; r < size; r++) {
+        peer = all;
+        peer.rank = r;
+        if (PMIx_Get(&peer, PMIX_HOSTNAME, NULL, 0, &val) == PMIX_SUCCESS)
+            PMIX_VALUE_RELEASE(val);
+        if (PMIx_Get(&peer, PMIX_LOCAL_RANK, NULL, 0, &val) == PMIX_SUCCESS)
+            PMIX_VALUE_RELEASE(val);
+    }
+    if (me.rank == 0)
+        printf("get_seconds=%f\n", now() - start);
+
+    memset(payload, 'x', sizeof(payload) - 1);
+    payload[sizeof(payload) - 1] = '\0';
+    value.type = PMIX_STRING;
+    value.data.string = payload;
+    PMIx_Put(PMIX_GLOBAL, "bench.modex", &value);
+    PMIx_Commit();
+
+    PMIX_INFO_LOAD(&info, PMIX_COLLECT_DATA, &collect, PMIX_BOOL);
+
+    start = now();
+    if (PMIx_Fence(&all, 1, &info, 1) != PMIX_SUCCESS)
+        return 2;
+    if (me.rank == 0)
+        printf("fence_seconds=%f\n", now() - start);
+
+    PMIx_Finalize(NULL, 0);
+    return 0;
+}
+"""
+
+MODES = {
+    "tcp": "PMIxDirectConn=false\n",
+    "dc": "PMIxDirectConn=true\nPMIxDirectConnUCX=false\n",
+    "ucx": "PMIxDirectConn=true\nPMIxDirectConnUCX=true\n",
+}
+
+
+def build_client(pmix_prefix: Path, workdir: Path) -> Path:
+    """Compile the PMIx test client and return its path."""
+    source = workdir / "pmix_fence.c"
+    binary = workdir / "pmix_fence"
+    source.write_text(PMIX_CLIENT)
+    libdirs = [d for d in (pmix_prefix / "lib", pmix_prefix / "lib64") if d.is_dir()]
+    subprocess.run(
+        [
+            os.environ.get("CC", "cc"),
+            "-O2",
+            f"-I{pmix_prefix / 'include'}",
+            str(source),
+            "-o",
+            str(binary),
+            *[f"-L{d}" for d in libdirs],
+            *[f"-Wl,-rpath,{d}" for d in libdirs],
+            "-lpmix",
+        ],
+        check=True,
+    )
+    return binary
+
+
+def bench_mode(
+    prefix: Path, workdir: Path, client: Path, mode: str, gds: str | None, args: argparse.Namespace
+) -> dict:
+    """Launch the client ``args.repeat`` times under one mpi.conf mode and GDS."""
+    env = {"UCX_TLS": "shm,tcp", "UCX_NET_DEVICES": "lo"}
+    if gds:
+        env["PMIX_MCA_gds"] = gds
+    cluster = LoopbackCluster(
+        prefix,
+        workdir,
+        nodes=args.nodes,
+        cpus_per_node=-(-args.tasks // args.nodes),
+        extra_conf={"MpiDefault": "pmix"},
+        extra_files={"mpi.conf": MODES[mode]},
+        env=env,
+    )
+    walls = []
+    timings = {"get_seconds": [], "fence_seconds": []}
+    with cluster:
+        for _ in range(args.repeat):
+            start = time.monotonic()
+            output = cluster.run("srun", "--mpi=pmix", f"-N{args.nodes}", f"-n{args.tasks}", str(client))
+            walls.append(time.monotonic() - start)
+            for line in output.splitlines():
+                key, _, value = line.partition("=")
+                if key in timings:
+                    timings[key].append(float(value))
+    result = {"srun_median_seconds": round(statistics.median(walls), 4)}
+    for key, values in timings.items():
+        result[key.replace("_seconds", "_median_seconds")] = (
+            round(statistics.median(values), 4) if values else None
+        )
+    return result
+
+
+def main():
+    """Run every requested mode and print the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--prefix", required=True, type=Path, help="Slurm install prefix")
+    parser.add_argument("--pmix-prefix", required=True, type=Path, help="PMIx prefix Slurm was built against")
+    parser.add_argument("--nodes", type=int, default=4, help="emulated slurmd instances")
+    parser.add_argument("--tasks", type=int, default=32, help="tasks per srun")
+    parser.add_argument("--repeat", type=int, default=5, help="sruns per mode; medians are reported")
+    parser.add_argument("--mode", action="append", choices=sorted(MODES), help="modes to run (default: all)")
+    parser.add_argument("--gds", action="append", help="PMIx GDS component to force (repeatable)")
+    args = parser.parse_args()
+
+    results = {"prefix": str(args.prefix), "nodes": args.nodes, "tasks": args.tasks, "modes": {}}
+    with tempfile.TemporaryDirectory(prefix="pmix-bench-") as tmp:
+        client = build_client(args.pmix_prefix, Path(tmp))
+        for mode in args.mode or list(MODES):
+            for gds in args.gds or [None]:
+                name = f"{mode}/gds={gds}" if gds else mode
+                workdir = Path(tmp) / name.replace("/", "-")
+                results["modes"][name] = bench_mode(args.prefix, workdir, client, mode, gds, args)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Measure scheduler throughput of installed Slurm prefixes on a single host.
+
+For every --prefix, starts slurmctld and N emulated slurmd instances (see
+loopback_cluster.py), submits a burst of batch jobs, job arrays and multi-step
+jobs, waits for the queue to drain and reports JSON with jobs per second,
+scheduler cycle latency from sdiag and slurmctld RSS. Step jobs run the
+srun of the prefix under test; any failed job fails the run. Example:
+
+    ./scripts/bench_scheduler_throughput.py \
+        --prefix $(spack location -i slurm_factory.slurm@25-11-6-1) \
+        --prefix $(spack location -i slurm_factory.slurm@26-05-0-1) \
+        --nodes 16 --jobs 2000 --arrays 10 --array-size 500
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loopback_cluster import LoopbackCluster
+
+
+def submit_burst(cluster: LoopbackCluster, args: argparse.Namespace) -> tuple[int, float]:
+    """Submit the configured job mix concurrently; return (job count, submit seconds)."""
+    submissions = [["sbatch", "--parsable", "-o", "/dev/null", "--wrap", "true"]] * args.jobs
+    submissions += [
+        ["sbatch", "--parsable", "-o", "/dev/null", f"--array=1-{args.array_size}", "--wrap", "true"]
+    ] * args.arrays
+    srun = cluster.command("srun")
+    step_script = f"for i in $(seq {args.steps}); do {srun} -n1 true || exit 1; done"
+    submissions += [["sbatch", "--parsable", "-o", "/dev/null", "--wrap", step_script]] * args.step_jobs
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda cmd: cluster.run(*cmd), submissions))
+    elapsed = time.monotonic() - start
+
+    total = args.jobs + args.arrays * args.array_size + args.step_jobs
+    return total, elapsed
+
+
+def bench_prefix(prefix: Path, workdir: Path, args: argparse.Namespace) -> dict:
+    """Run one throughput measurement against ``prefix``."""
+    cluster = LoopbackCluster(prefix, workdir, nodes=args.nodes, cpus_per_node=args.cpus_per_node)
+    with cluster:
+        idle_rss = cluster.slurmctld_rss_kib()["rss_kib"]
+        start = time.monotonic()
+        total, submit_seconds = submit_burst(cluster, args)
+        cluster.wait_for_empty_queue(timeout=args.timeout)
+        elapsed = time.monotonic() - start
+        # Finished jobs stay visible for MinJobAge, so failed steps show up here
+        failed = cluster.run("squeue", "-h", "--states=FAILED", "-o", "%i").split()
+        if failed:
+            raise RuntimeError(f"{len(failed)} jobs failed on {prefix}, e.g. job {failed[0]}")
+
+        return {
+            "prefix": str(prefix),
+            "version": cluster.version(),
+            "nodes": args.nodes,
+            "jobs": total,
+            "submit_seconds": round(submit_seconds, 3),
+            "submit_jobs_per_second": round(total / submit_seconds, 1),
+            "drain_seconds": round(elapsed, 3),
+            "jobs_per_second": round(total / elapsed, 1),
+            "scheduler": cluster.sdiag(),
+            "slurmctld_idle_rss_kib": idle_rss,
+            **{f"slurmctld_{k}": v for k, v in cluster.slurmctld_rss_kib().items()},
+        }
+
+
+def main():
+    """Benchmark every given prefix and print the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--prefix", action="append", required=True, type=Path, help="Slurm install prefix")
+    parser.add_argument(
+        "--nodes", type=int, default=8, help="emulated slurmd instances (default: %(default)s)"
+    )
+    parser.add_argument("--cpus-per-node", type=int, default=8, help="CPUs per emulated node")
+    parser.add_argument("--jobs", type=int, default=1000, help="single batch jobs to submit")
+    parser.add_argument("--arrays", type=int, default=4, help="job arrays to submit")
+    parser.add_argument("--array-size", type=int, default=250, help="tasks per job array")
+    parser.add_argument("--step-jobs", type=int, default=20, help="jobs that each launch --steps srun steps")
+    parser.add_argument("--steps", type=int, default=10, help="srun steps per step job")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel sbatch clients")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds to wait for the queue to drain")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="slurm-bench-") as tmp:
+        for i, prefix in enumerate(args.prefix):
+            results.append(bench_prefix(prefix, Path(tmp) / str(i), args))
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Measure slurmrestd latency and throughput on a loopback cluster.
+
+Starts slurmctld, the emulated slurmd nodes and slurmrestd on localhost with a
+locally generated JWT key, then drives concurrent job list, node list and job
+submit requests and reports p50/p99 latency and requests per second per
+endpoint as JSON. The newest data_parser API version the prefix serves is
+discovered from its OpenAPI spec, so the same run works for 23.11 through 26.x:
+
+    ./scripts/bench_slurmrestd.py --prefix $(spack location -i slurm_factory.slurm@26-05-0-1)
+
+slurmrestd refuses to run as root or SlurmUser, so it is started with
+``-u/-g`` set to --restd-user (default: nobody).
+"""
+
+import argparse
+import getpass
+import http.client
+import json
+import pwd
+import re
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loopback_cluster import LoopbackCluster
+
+RESTD_PORT = 6820
+
+
+class RestClient:
+    """Minimal JWT-authenticated slurmrestd client (one connection per request)."""
+
+    def __init__(self, port: int, user: str, token: str):
+        """Store the port and the JWT authentication headers."""
+        self.port = port
+        self.headers = {
+            "X-SLURM-USER-NAME": user,
+            "X-SLURM-USER-TOKEN": token,
+            "Content-Type": "application/json",
+        }
+
+    def request(self, method: str, path: str, body: dict | None = None) -> tuple[int, bytes]:
+        """Send one request and return (status, body)."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        try:
+            payload = json.dumps(body) if body is not None else None
+            conn.request(method, path, body=payload, headers=self.headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+
+def discover_api_version(client: RestClient) -> str:
+    """Return the newest /slurm/vX.Y.Z API version served by slurmrestd."""
+    status, body = client.request("GET", "/openapi/v3")
+    if status != 200:
+        raise RuntimeError(f"GET /openapi/v3 returned {status}")
+    versions = set(re.findall(r"/slurm/(v\d+\.\d+\.\d+)/jobs", body.decode()))
+    if not versions:
+        raise RuntimeError("no /slurm/<version>/jobs endpoint in the OpenAPI spec")
+    return max(versions, key=lambda v: tuple(int(x) for x in v[1:].split(".")))
+
+
+def wait_for_restd(client: RestClient, timeout: float = 60.0):
+    """Poll until slurmrestd accepts connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            client.request("GET", "/openapi/v3")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("slurmrestd did not come up")
+
+
+def run_endpoint(
+    client: RestClient, method: str, path: str, body: dict | None, requests: int, concurrency: int
+):
+    """Fire ``requests`` calls at one endpoint and summarize latency and throughput."""
+
+    def one(_):
+        start = time.perf_counter()
+        status, _body = client.request(method, path, body)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for s in samples if s[1] != 200)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentiles[49], 2),
+        "p99_ms": round(percentiles[98], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+def bench_prefix(prefix: Path, workdir: Path, args: argparse.Namespace) -> dict:
+    """Benchmark slurmrestd from one install prefix."""
+    restd_user = pwd.getpwnam(args.restd_user)
+    cluster = LoopbackCluster(prefix, workdir, nodes=args.nodes, jwt=True)
+    with cluster:
+        # slurm.conf must be readable by the unprivileged slurmrestd user.
+        cluster.conf_path.parent.chmod(0o755)
+        cluster.conf_path.chmod(0o644)
+        cluster.spawn(
+            "slurmrestd",
+            "-a",
+            "rest_auth/jwt",
+            "-u",
+            str(restd_user.pw_uid),
+            "-g",
+            str(restd_user.pw_gid),
+            f"127.0.0.1:{RESTD_PORT}",
+        )
+
+        user = getpass.getuser()
+        client = RestClient(RESTD_PORT, user, cluster.token(user))
+        wait_for_restd(client)
+        api = discover_api_version(client)
+        version = cluster.version()
+
+        submit = {
+            "job": {
+                "name": "restd-bench",
+                "partition": "bench",
+                "script": "#!/bin/sh\ntrue\n",
+                "current_working_directory": "/tmp",
+                "environment": ["PATH=/usr/bin:/bin"],
+            }
+        }
+        endpoints = {
+            "job_submit": ("POST", f"/slurm/{api}/job/submit", submit),
+            "job_list": ("GET", f"/slurm/{api}/jobs", None),
+            "node_list": ("GET", f"/slurm/{api}/nodes", None),
+        }
+        results = {
+            name: run_endpoint(client, method, path, body, args.requests, args.concurrency)
+            for name, (method, path, body) in endpoints.items()
+        }
+
+    return {
+        "prefix": str(prefix),
+        "version": version,
+        "api_version": api,
+        "concurrency": args.concurrency,
+        "endpoints": results,
+    }
+
+
+def main():
+    """Benchmark every given prefix and print the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--prefix", action="append", required=True, type=Path, help="Slurm install prefix")
+    parser.add_argument("--nodes", type=int, default=4, help="emulated slurmd instances")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent HTTP clients")
+    parser.add_argument("--restd-user", default="nobody", help="unprivileged user slurmrestd runs as")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="slurmrestd-bench-") as tmp:
+        Path(tmp).chmod(0o755)
+        for i, prefix in enumerate(args.prefix):
+            results.append(bench_prefix(prefix, Path(tmp) / str(i), args))
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Build an offline Spack source mirror for every version in this repo.
+
+Each version declared in the repo's recipes (packages that inherit their
+versions from builtin are taken at their default version) is concretized
+through ``spack python``. Each node of the closure then yields its sources,
+resources and URL patches, with the mirror paths Spack itself would use.
+Sources are fetched in parallel straight into the Spack mirror layout
+(_source-cache/archive/<xx>/<digest>.<ext> plus the <name>/<name>-<version>
+alias), and each checksum is verified before the file is moved into place.
+
+--upstream mirrors are tried before the package URLs, each with --retries
+attempts and exponential backoff. mirror-index.json records every resolved
+spec and verified file, so a refresh only concretizes new specs and only
+fetches files that are not already present (--verify re-hashes those in
+parallel as well). Non-URL sources, such as git versions, are handed to
+``spack mirror create``.
+
+    ./scripts/build_source_mirror.py /srv/mirror/slurm-factory --jobs 16
+    spack mirror add --scope site slurm-factory file:///srv/mirror/slurm-factory
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+PACKAGES_DIR = REPO_ROOT / "spack_repo" / "slurm_factory" / "packages"
+INDEX = "mirror-index.json"
+DIGEST_ALGORITHMS = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+
+# Runs inside ``spack python``: concretize each spec and describe every source stage of its closure
+RESOLVER = r"""
+import json
+import sys
+
+import spack.cmd
+
+try:
+    from spack.concretize import concretize_one
+except ImportError:
+    def concretize_one(spec):
+        return spec.concretized()
+
+
+def layout(stage):
+    mirror = getattr(stage, "mirror_layout", None)
+    if mirror is not None:
+        return mirror.digest_path, mirror.alias
+    paths = stage.mirror_paths
+    return paths.storage_path, paths.cosmetic_path
+
+
+output, texts = sys.argv[1], sys.argv[2:]
+result = {}
+for text in texts:
+    entries = []
+    for node in concretize_one(spack.cmd.parse_specs([text])[0]).traverse():
+        if node.external or node.virtual or not node.package.has_code:
+            continue
+        for stage in node.package.stage:
+            fetcher = stage.default_fetcher
+            path, alias = layout(stage)
+            urls = list(getattr(fetcher, "urls", None) or [getattr(fetcher, "url", None)])
+            entries.append({
+                "spec": node.format("{name}@{version}"),
+                "path": path,
+                "alias": alias,
+                "digest": getattr(fetcher, "digest", None),
+                "urls": [u for u in urls if u],
+            })
+    result[text] = entries
+with open(output, "w") as f:
+    json.dump(result, f)
+"""
+
+
+def repo_specs() -> list[str]:
+    """Return one spec per version declared in the repo (default version for inherited ones)."""
+    specs = []
+    for recipe in sorted(PACKAGES_DIR.glob("*/package.py")):
+        name = recipe.parent.name.replace("_", "-")
+        versions = re.findall(r'^\s*version\(\s*"([^"]+)"', recipe.read_text(), flags=re.MULTILINE)
+        specs.extend([f"slurm_factory.{name}@={v}" for v in versions] or [f"slurm_factory.{name}"])
+    return specs
+
+
+def resolve(spack: str, specs: list[str]) -> dict[str, list[dict]]:
+    """Concretize ``specs`` and return {spec: source entries of its closure}."""
+    with tempfile.TemporaryDirectory(prefix="source-mirror-") as tmp:
+        script = Path(tmp) / "resolve.py"
+        output = Path(tmp) / "sources.json"
+        script.write_text(RESOLVER)
+        subprocess.run([spack, "python", str(script), str(output), *specs], check=True)
+        return json.loads(output.read_text())
+
+
+def file_digest(path: Path, digest: str) -> str:
+    """Hash ``path`` with the algorithm matching the length of ``digest``."""
+    hasher = hashlib.new(DIGEST_ALGORITHMS[len(digest)])
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def link_alias(mirror: Path, entry: dict):
+    """Point the human-readable <name>/<name>-<version> path at the content-addressed file."""
+    if not entry["alias"] or entry["alias"] == entry["path"]:
+        return
+    alias = mirror / entry["alias"]
+    alias.parent.mkdir(parents=True, exist_ok=True)
+    if alias.is_symlink() or alias.exists():
+        alias.unlink()
+    alias.symlink_to(os.path.relpath(mirror / entry["path"], alias.parent))
+
+
+def fetch(mirror: Path, entry: dict, upstreams: list[str], retries: int, timeout: float) -> dict:
+    """Download one entry, trying every upstream mirror before the package URLs, and verify it."""
+    target = mirror / entry["path"]
+    target.parent.mkdir(parents=True, exist_ok=True)
+    part = target.with_name(target.name + ".part")
+    urls = [f"{u.rstrip('/')}/{entry['path']}" for u in upstreams] + entry["urls"]
+    errors = []
+    start = time.perf_counter()
+    for url in urls:
+        for attempt in range(retries):
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response, open(part, "wb") as f:
+                    while chunk := response.read(1 << 20):
+                        f.write(chunk)
+                actual = file_digest(part, entry["digest"])
+                if actual != entry["digest"]:
+                    # A bad checksum is not transient; move on to the next URL
+                    errors.append(f"{url}: checksum {actual}")
+                    break
+                os.replace(part, target)
+                link_alias(mirror, entry)
+                return {
+                    "status": "fetched",
+                    "url": url,
+                    "attempts": len(errors) + 1,
+                    "seconds": round(time.perf_counter() - start, 2),
+                }
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(f"{url}: {e}")
+                if attempt + 1 < retries:
+                    time.sleep(min(2**attempt, 30))
+    part.unlink(missing_ok=True)
+    return {"status": "failed", "errors": errors}
+
+
+def verify(mirror: Path, entry: dict) -> dict:
+    """Re-hash an existing mirror file."""
+    actual = file_digest(mirror / entry["path"], entry["digest"])
+    if actual == entry["digest"]:
+        link_alias(mirror, entry)
+        return {"status": "verified"}
+    return {"status": "corrupt", "errors": [f"checksum {actual}"]}
+
+
+def main():
+    """Resolve, fetch and verify the repo's sources; print a JSON summary."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("mirror", type=Path, help="mirror directory to create or refresh")
+    parser.add_argument("--spec", action="append", help="spec to mirror (default: every version in the repo)")
+    parser.add_argument(
+        "--upstream", action="append", default=[], help="mirror URL tried before package URLs"
+    )
+    parser.add_argument("--jobs", type=int, default=8, help="parallel fetches/verifications")
+    parser.add_argument("--retries", type=int, default=3, help="attempts per URL")
+    parser.add_argument("--timeout", type=float, default=60, help="socket timeout per request in seconds")
+    parser.add_argument("--verify", action="store_true", help="re-hash files already in the mirror")
+    parser.add_argument("--full", action="store_true", help="re-resolve specs already in the index")
+    parser.add_argument("--spack", default="spack", help="spack executable (default: %(default)s)")
+    args = parser.parse_args()
+
+    mirror = args.mirror.resolve()
+    mirror.mkdir(parents=True, exist_ok=True)
+    index_path = mirror / INDEX
+    index = json.loads(index_path.read_text()) if index_path.exists() else {"specs": {}}
+
+    specs = args.spec or repo_specs()
+    new_specs = [s for s in specs if args.full or s not in index["specs"]]
+    if new_specs:
+        index["specs"].update(resolve(args.spack, new_specs))
+
+    entries, fallback = {}, set()
+    for spec in specs:
+        for entry in index["specs"][spec]:
+            if entry["path"] and entry["digest"] and len(entry["digest"]) in DIGEST_ALGORITHMS:
+                entries.setdefault(entry["path"], entry)
+            else:
+                fallback.add(entry["spec"])
+
+    missing = [e for e in entries.values() if not (mirror / e["path"]).exists()]
+    present = [e for e in entries.values() if (mirror / e["path"]).exists()] if args.verify else []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        fetched = list(
+            pool.map(lambda e: fetch(mirror, e, args.upstream, args.retries, args.timeout), missing)
+        )
+        verified = list(pool.map(lambda e: verify(mirror, e), present))
+
+    if fallback:
+        subprocess.run([args.spack, "mirror", "create", "-d", str(mirror), *sorted(fallback)], check=False)
+
+    index_path.write_text(json.dumps(index, indent=2, sort_keys=True) + "\n")
+
+    failed = {e["path"]: r["errors"] for e, r in zip(missing + present, fetched + verified) if "errors" in r}
+    print(
+        json.dumps(
+            {
+                "mirror": str(mirror),
+                "specs": len(specs),
+                "resolved": len(new_specs),
+                "files": len(entries),
+                "fetched": sum(r["status"] == "fetched" for r in fetched),
+                "retried": sum(r.get("attempts", 1) > 1 for r in fetched),
+                "fetch_seconds": round(sum(r.get("seconds", 0) for r in fetched), 2),
+                "already_present": len(entries) - len(missing),
+                "verified": sum(r["status"] == "verified" for r in verified),
+                "spack_mirror_create": sorted(fallback),
+                "failed": failed,
+            },
+            indent=2,
+        )
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
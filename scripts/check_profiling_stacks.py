@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Check that frame-pointer call stacks of a +profiling Slurm are complete.
+
+Starts a loopback cluster from --prefix and keeps slurmctld busy with held
+sbatch submissions plus squeue and scontrol queries. Meanwhile it runs
+``perf record --call-graph fp`` against slurmctld, the way a
+production profiler would: frame pointers only, no DWARF unwinding, no
+debug info. A user-space stack is counted as complete when its outermost
+frame is a thread entry point (_start, __libc_start_main, start_thread,
+clone). A frame-pointer walk that loses a frame ends somewhere else.
+
+The check fails when fewer than --min-complete of the samples that have
+user-space frames are complete. Compare against a ~profiling prefix to
+see what the variant fixes:
+
+    ./scripts/check_profiling_stacks.py --prefix $(spack location -i slurm_factory.slurm+profiling)
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loopback_cluster import LoopbackCluster
+
+ROOT_FRAMES = re.compile(
+    r"^(_start|__libc_start_main\S*|__libc_start_call_main|start_thread|clone3?|thread_start)$"
+)
+FRAME_RE = re.compile(r"^\s+([0-9a-f]+)\s+(.*?)\s+\((.*)\)$")
+KERNEL_DSO = re.compile(r"^\[kernel|\.ko$|^\[vdso\]$")
+
+
+def generate_load(cluster: LoopbackCluster, stop: threading.Event, concurrency: int) -> int:
+    """Submit held jobs and query them until ``stop`` is set; return the number of client calls."""
+    calls = [
+        ["sbatch", "--hold", "-J", "profiling-check", "-o", "/dev/null", "--wrap", "true"],
+        ["squeue", "-h"],
+        ["scontrol", "show", "job"],
+    ]
+
+    def worker(i: int) -> int:
+        count = 0
+        while not stop.is_set():
+            cluster.run(*calls[(i + count) % len(calls)], check=False)
+            count += 1
+        return count
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sum(pool.map(worker, range(concurrency)))
+
+
+def parse_samples(script_output: str) -> list[list[tuple[str, str]]]:
+    """Split ``perf script`` output into samples of (symbol, dso) frames, innermost first."""
+    samples, frames = [], None
+    for line in script_output.splitlines():
+        if not line.strip():
+            if frames:
+                samples.append(frames)
+            frames = None
+        elif not line[0].isspace():
+            frames = []
+        elif frames is not None:
+            match = FRAME_RE.match(line)
+            if match:
+                frames.append((match.group(2), match.group(3)))
+    if frames:
+        samples.append(frames)
+    return samples
+
+
+def analyze(samples: list[list[tuple[str, str]]], prefix: Path) -> dict:
+    """Count complete stacks, their depth and unresolved Slurm frames."""
+    user_samples = complete = unknown_slurm = slurm_frames = 0
+    depths = []
+    truncated_at: dict[str, int] = {}
+    for frames in samples:
+        user = [(sym, dso) for sym, dso in frames if not KERNEL_DSO.search(dso)]
+        if not user:
+            continue
+        user_samples += 1
+        outermost = re.sub(r"\+0x[0-9a-f]+$", "", user[-1][0])
+        if ROOT_FRAMES.match(outermost):
+            complete += 1
+            depths.append(len(user))
+        else:
+            key = f"{outermost} ({Path(user[-1][1]).name})"
+            truncated_at[key] = truncated_at.get(key, 0) + 1
+        for sym, dso in user:
+            if dso.startswith(str(prefix)):
+                slurm_frames += 1
+                unknown_slurm += sym.startswith("[unknown]")
+
+    depths.sort()
+    return {
+        "samples": len(samples),
+        "user_samples": user_samples,
+        "complete_stacks": complete,
+        "complete_fraction": round(complete / user_samples, 3) if user_samples else 0.0,
+        "median_depth": depths[len(depths) // 2] if depths else 0,
+        "slurm_frames": slurm_frames,
+        "unresolved_slurm_frames": unknown_slurm,
+        "top_truncation_points": dict(sorted(truncated_at.items(), key=lambda kv: -kv[1])[:10]),
+    }
+
+
+def main():
+    """Profile a busy loopback slurmctld and print stack completeness as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--prefix", required=True, type=Path, help="Slurm install prefix")
+    parser.add_argument("--duration", type=int, default=10, help="seconds to record")
+    parser.add_argument("--frequency", type=int, default=999, help="perf sampling frequency in Hz")
+    parser.add_argument(
+        "--event", default="cpu-clock", help="perf event (default: %(default)s, works in VMs)"
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel client commands")
+    parser.add_argument("--min-complete", type=float, default=0.9, help="required complete-stack fraction")
+    parser.add_argument("--perf", default="perf", help="perf executable (default: %(default)s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="profiling-check-") as tmp:
+        data = Path(tmp) / "perf.data"
+        with LoopbackCluster(args.prefix, Path(tmp) / "cluster", nodes=1) as cluster:
+            stop = threading.Event()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                load = pool.submit(generate_load, cluster, stop, args.concurrency)
+                try:
+                    subprocess.run(
+                        [
+                            args.perf,
+                            "record",
+                            "-q",
+                            "-e",
+                            args.event,
+                            "-F",
+                            str(args.frequency),
+                            "--call-graph",
+                            "fp",
+                            "-p",
+                            str(cluster.slurmctld.pid),
+                            "-o",
+                            str(data),
+                            "--",
+                            "sleep",
+                            str(args.duration),
+                        ],
+                        check=True,
+                    )
+                finally:
+                    stop.set()
+                client_calls = load.result()
+
+        script = subprocess.run(
+            [args.perf, "script", "-i", str(data), "-F", "comm,tid,ip,sym,dso"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    result = {
+        "prefix": str(args.prefix),
+        "client_calls": client_calls,
+        **analyze(parse_samples(script), args.prefix),
+    }
+    result["passed"] = result["user_samples"] > 0 and result["complete_fraction"] >= args.min_complete
+    print(json.dumps(result, indent=2))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Export an installed Slurm and its runtime closure as one relocatable bundle.
+
+Copies the prefix (without .spack and lib/debug) into a staging tree. Every
+library the ELF files load from other Spack prefixes (see
+analyze_runtime_closure.py) is copied to lib/private, the layout the
+S2nTls/Slurm $ORIGIN RPATH fixups already expect. The export then:
+
+  * rewrites the RUNPATH of every ELF file to $ORIGIN-relative lib,
+    lib/slurm and lib/private (patchelf)
+  * makes absolute symlinks into Spack prefixes relative, copying targets
+    from other prefixes (the LuaJIT liblua5.1.so link) to lib/private
+  * copies executables that scripts run from other prefixes (hwloc's
+    lstopo for slurm-topology-cache) to libexec
+  * replaces the prefix path in text files (scripts, .pc, ...) with
+    --mount-point, and in the C strings of binaries (the compiled-in
+    slurm.conf path and PluginDir) when the mount point is not longer
+    than the prefix
+  * writes env.sh, which also sets SLURM_CONF
+  * hardlinks files with identical content
+  * writes MANIFEST.sha256 inside the bundle and a .sha256 of the
+    archive next to it
+
+and packs the result as a zstd tarball or a zstd squashfs image:
+
+    ./scripts/export_bundle.py $(spack location -i slurm_factory.slurm) \
+        --format squashfs --mount-point /opt/slurm -o slurm-25.11.sqfs
+
+Driver-provided libraries (libnvidia-ml.so.1 for +nvml) are not bundled.
+Files that still contain a Spack prefix afterwards are listed under
+embedded_store_paths. With a mount point longer than the prefix, that
+includes the binaries' compiled-in defaults; then set
+PluginDir=<mount point>/lib/slurm in slurm.conf.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from analyze_runtime_closure import elf_files, library_owners, runtime_closure
+
+LIB_DIRS = ("lib", "lib64", "lib/slurm", "lib/private")
+
+
+def sha256(path: Path) -> str:
+    """Return the hex SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stage_prefix(prefix: Path, bundle: Path, include_debug: bool):
+    """Copy the install prefix into ``bundle``, keeping symlinks."""
+
+    def ignore(directory, names):
+        skip = {".spack"}
+        if not include_debug and Path(directory) == prefix / "lib":
+            skip.add("debug")
+        return [n for n in names if n in skip]
+
+    shutil.copytree(prefix, bundle, symlinks=True, ignore=ignore)
+    spec_json = prefix / ".spack" / "spec.json"
+    if spec_json.exists():
+        (bundle / "share" / "bundle").mkdir(parents=True, exist_ok=True)
+        shutil.copy2(spec_json, bundle / "share" / "bundle" / "spec.json")
+
+
+def relink_store_symlinks(bundle: Path, prefix: Path, owners: list[tuple[Path, str]]) -> list[str]:
+    """
+    Make absolute symlinks into Spack prefixes relative; return the rewritten links.
+
+    Links into the install prefix point at the same path inside the bundle.
+    Links into other prefixes (e.g. liblua5.1.so -> LuaJIT, which is only
+    dlopen()ed) get their target copied to lib/private first.
+    """
+    private = bundle / "lib" / "private"
+    relinked = []
+    for root, dirs, files in os.walk(bundle):
+        for name in dirs + files:
+            link = Path(root) / name
+            if not link.is_symlink() or not os.readlink(link).startswith(os.sep):
+                continue
+            target = Path(os.readlink(link))
+            if target.is_relative_to(prefix):
+                new = bundle / target.relative_to(prefix)
+            elif any(target.is_relative_to(p) for p, _ in owners) and target.is_file():
+                private.mkdir(parents=True, exist_ok=True)
+                real = target.resolve()
+                new = private / real.name
+                if not new.exists():
+                    shutil.copy2(real, new)
+                    new.chmod(new.stat().st_mode | 0o200)
+            else:
+                continue
+            link.unlink()
+            link.symlink_to(os.path.relpath(new, link.parent))
+            relinked.append(str(link.relative_to(bundle)))
+    return relinked
+
+
+def bundle_helper_executables(bundle: Path, prefix: Path, owners: list[tuple[Path, str]]) -> list[str]:
+    """
+    Copy executables that scripts run from other prefixes into libexec.
+
+    slurm-topology-cache, for one, runs hwloc's lstopo-no-graphics by its
+    absolute path. The reference is pointed at <prefix>/libexec, which
+    rewrite_text_prefix() then maps to the mount point.
+    """
+    libexec = bundle / "libexec"
+    patterns = [
+        re.compile(re.escape(str(p).encode()) + rb"/s?bin/([\w.+-]+)") for p, name in owners if p != prefix
+    ]
+    copied = set()
+    for root, _, files in os.walk(bundle):
+        for name in files:
+            path = Path(root) / name
+            if path.is_symlink():
+                continue
+            data = path.read_bytes()
+            if data.startswith(b"\x7fELF") or b"\0" in data[:8192]:
+                continue
+            new_data = data
+            for pattern in patterns:
+                for reference in {m.group(0) for m in pattern.finditer(data)}:
+                    exe = Path(reference.decode())
+                    if not exe.is_file():
+                        continue
+                    libexec.mkdir(exist_ok=True)
+                    if not (libexec / exe.name).exists():
+                        shutil.copy2(exe.resolve(), libexec / exe.name)
+                        copied.add(exe.name)
+                    new_data = new_data.replace(reference, str(prefix / "libexec" / exe.name).encode())
+            if new_data != data:
+                path.chmod(path.stat().st_mode | 0o200)
+                path.write_bytes(new_data)
+    return sorted(copied)
+
+
+def copy_private_libraries(libraries: dict[Path, set], bundle: Path) -> int:
+    """Copy closure libraries into lib/private and link every DT_NEEDED name to them."""
+    private = bundle / "lib" / "private"
+    private.mkdir(parents=True, exist_ok=True)
+    for real, names in libraries.items():
+        target = private / real.name
+        if not target.exists():
+            shutil.copy2(real, target)
+            target.chmod(target.stat().st_mode | 0o200)
+        for name in names - {real.name}:
+            link = private / name
+            if not link.exists() and not link.is_symlink():
+                link.symlink_to(real.name)
+    return len(libraries)
+
+
+def rewrite_runpaths(bundle: Path, patchelf: str) -> int:
+    """Point the RUNPATH of every ELF file at the bundle's library dirs via $ORIGIN."""
+    lib_dirs = [bundle / d for d in LIB_DIRS if (bundle / d).is_dir()]
+    count = 0
+    for elf in elf_files(bundle):
+        has_dynamic = subprocess.run([patchelf, "--print-rpath", str(elf)], capture_output=True)
+        if has_dynamic.returncode != 0:
+            continue
+        runpath = ":".join(
+            "$ORIGIN" if d == elf.parent else f"$ORIGIN/{os.path.relpath(d, elf.parent)}" for d in lib_dirs
+        )
+        elf.chmod(elf.stat().st_mode | 0o200)
+        subprocess.run([patchelf, "--set-rpath", runpath, str(elf)], check=True)
+        count += 1
+    return count
+
+
+def rewrite_text_prefix(bundle: Path, prefix: Path, mount_point: str) -> list[str]:
+    """Replace the install prefix in non-ELF text files; return the rewritten paths."""
+    old = str(prefix).encode()
+    rewritten = []
+    for root, _, files in os.walk(bundle):
+        for name in files:
+            path = Path(root) / name
+            if path.is_symlink():
+                continue
+            data = path.read_bytes()
+            if data.startswith(b"\x7fELF") or b"\0" in data[:8192] or old not in data:
+                continue
+            path.chmod(path.stat().st_mode | 0o200)
+            path.write_bytes(data.replace(old, mount_point.encode()))
+            rewritten.append(str(path.relative_to(bundle)))
+    return rewritten
+
+
+def rewrite_binary_prefix(bundle: Path, prefix: Path, mount_point: str) -> list[str]:
+    """
+    Replace the install prefix in C strings of ELF and other binary files.
+
+    Covers the compiled-in defaults such as the slurm.conf path and
+    PluginDir. As in Spack's binary relocation, each string keeps its
+    length: it is padded with NUL bytes, so the mount point must not be
+    longer than the prefix. Separate debug files are left alone so that
+    their .gnu_debuglink CRC still matches. Returns the rewritten paths.
+    """
+    old = str(prefix).encode()
+    new = mount_point.encode()
+    if len(new) > len(old):
+        return []
+    pattern = re.compile(re.escape(old) + rb"([^\0]*\0)")
+    pad = b"\0" * (len(old) - len(new))
+    rewritten = []
+    for root, _, files in os.walk(bundle):
+        for name in files:
+            path = Path(root) / name
+            if path.is_symlink() or name.endswith(".debug"):
+                continue
+            data = path.read_bytes()
+            if not (data.startswith(b"\x7fELF") or b"\0" in data[:8192]) or old not in data:
+                continue
+            path.chmod(path.stat().st_mode | 0o200)
+            path.write_bytes(pattern.sub(lambda m: new + m.group(1) + pad, data))
+            rewritten.append(str(path.relative_to(bundle)))
+    return rewritten
+
+
+def embedded_store_paths(bundle: Path, owners: list[tuple[Path, str]]) -> dict[str, list[str]]:
+    """Return {file: [package]} for files that still contain a Spack prefix."""
+    prefixes = [(str(p).encode(), name) for p, name in owners]
+    found = {}
+    for root, _, files in os.walk(bundle):
+        for name in files:
+            path = Path(root) / name
+            if path.is_symlink():
+                continue
+            data = path.read_bytes()
+            packages = sorted({pkg for p, pkg in prefixes if p in data})
+            if packages:
+                found[str(path.relative_to(bundle))] = packages
+    return found
+
+
+def default_slurm_conf(prefix: Path, mount_point: str) -> str:
+    """Return the compiled-in slurm.conf path, with the prefix replaced by the mount point."""
+    spec_json = prefix / ".spack" / "spec.json"
+    sysconfdir = "PREFIX/etc"
+    if spec_json.exists():
+        root = json.loads(spec_json.read_text())["spec"]["nodes"][0]
+        sysconfdir = root.get("parameters", {}).get("sysconfdir", sysconfdir)
+    if sysconfdir == "PREFIX/etc":
+        return f"{mount_point}/etc/slurm.conf"
+    return f"{sysconfdir.replace(str(prefix), mount_point)}/slurm.conf"
+
+
+def write_env_script(bundle: Path, mount_point: str, slurm_conf: str):
+    """Write env.sh that puts the mounted bundle on PATH and sets SLURM_CONF."""
+    (bundle / "env.sh").write_text(
+        f"# Source after mounting the bundle at {mount_point}\n"
+        f'export SLURM_ROOT="{mount_point}"\n'
+        f'export SLURM_CONF="${{SLURM_CONF:-{slurm_conf}}}"\n'
+        'export PATH="$SLURM_ROOT/bin:$SLURM_ROOT/sbin:$PATH"\n'
+        'export MANPATH="$SLURM_ROOT/share/man:${MANPATH:-}"\n'
+    )
+
+
+def deduplicate(bundle: Path) -> tuple[int, int]:
+    """Hardlink regular files with identical content; return (files linked, bytes saved)."""
+    by_digest = {}
+    linked = saved = 0
+    for root, _, files in os.walk(bundle):
+        for name in sorted(files):
+            path = Path(root) / name
+            if path.is_symlink():
+                continue
+            key = (path.stat().st_size, sha256(path), path.stat().st_mode)
+            first = by_digest.setdefault(key, path)
+            if first != path and first.stat().st_ino != path.stat().st_ino:
+                path.unlink()
+                os.link(first, path)
+                linked += 1
+                saved += key[0]
+    return linked, saved
+
+
+def write_manifest(bundle: Path) -> int:
+    """Write MANIFEST.sha256 (sha256sum format) for every regular file in the bundle."""
+    lines = []
+    for root, _, files in os.walk(bundle):
+        for name in files:
+            path = Path(root) / name
+            if not path.is_symlink():
+                lines.append(f"{sha256(path)}  ./{path.relative_to(bundle)}")
+    lines.sort(key=lambda line: line.split("  ", 1)[1])
+    (bundle / "MANIFEST.sha256").write_text("\n".join(lines) + "\n")
+    return len(lines)
+
+
+def pack(bundle: Path, output: Path, fmt: str, level: int):
+    """Create the tar.zst or squashfs image from the staging tree."""
+    if fmt == "squashfs":
+        subprocess.run(
+            [
+                "mksquashfs",
+                str(bundle),
+                str(output),
+                "-noappend",
+                "-comp",
+                "zstd",
+                "-Xcompression-level",
+                str(level),
+                "-all-root",
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    else:
+        subprocess.run(
+            [
+                "tar",
+                "--sort=name",
+                "--owner=0",
+                "--group=0",
+                "--numeric-owner",
+                "-I",
+                f"zstd -{level} -T0",
+                "-cf",
+                str(output),
+                "-C",
+                str(bundle),
+                ".",
+            ],
+            check=True,
+        )
+
+
+def main():
+    """Build the bundle and print a JSON summary."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("prefix", type=Path, help="installed Slurm prefix")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="bundle file to write")
+    parser.add_argument("--format", choices=("tar.zst", "squashfs"), default="tar.zst", help="bundle format")
+    parser.add_argument("--mount-point", default="/opt/slurm", help="where nodes mount/unpack the bundle")
+    parser.add_argument("--level", type=int, default=19, help="zstd compression level")
+    parser.add_argument("--include-debug", action="store_true", help="keep lib/debug (+separate_debug)")
+    parser.add_argument("--spack", default="spack", help="spack executable (default: %(default)s)")
+    args = parser.parse_args()
+
+    patchelf = shutil.which("patchelf")
+    if not patchelf:
+        parser.error("patchelf is required (spack install patchelf && spack load patchelf)")
+    packer = "mksquashfs" if args.format == "squashfs" else "zstd"
+    if not shutil.which(packer):
+        parser.error(f"{packer} is required for --format {args.format}")
+
+    prefix = args.prefix.resolve()
+    root, _, owners = library_owners(prefix, args.spack)
+    with tempfile.TemporaryDirectory(prefix="slurm-bundle-") as tmp:
+        bundle = Path(tmp) / "bundle"
+        stage_prefix(prefix, bundle, args.include_debug)
+        relinked = relink_store_symlinks(bundle, prefix, owners)
+        helpers = bundle_helper_executables(bundle, prefix, owners)
+
+        # Resolve through the original RUNPATHs before they are rewritten. The
+        # bundle does not set LD_LIBRARY_PATH, so neither does the resolution.
+        closure = runtime_closure(elf_files(bundle), owners, root, ld_library_path=[])
+        if closure.missing:
+            print(json.dumps({"missing": {k: sorted(v) for k, v in closure.missing.items()}}, indent=2))
+            return 1
+        private = copy_private_libraries(closure.libraries, bundle)
+        patched = rewrite_runpaths(bundle, patchelf)
+        rewritten = rewrite_text_prefix(bundle, prefix, args.mount_point)
+        rewritten_binary = rewrite_binary_prefix(bundle, prefix, args.mount_point)
+        write_env_script(bundle, args.mount_point, default_slurm_conf(prefix, args.mount_point))
+        leftover = embedded_store_paths(bundle, owners)
+        linked, dedup_bytes = deduplicate(bundle)
+        files = write_manifest(bundle)
+
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        pack(bundle, args.output, args.format, args.level)
+
+    digest = sha256(args.output)
+    checksum = args.output.with_name(args.output.name + ".sha256")
+    checksum.write_text(f"{digest}  {args.output.name}\n")
+
+    print(
+        json.dumps(
+            {
+                "package": root,
+                "output": str(args.output),
+                "format": args.format,
+                "mount_point": args.mount_point,
+                "bytes": args.output.stat().st_size,
+                "sha256": digest,
+                "files": files,
+                "private_libraries": private,
+                "driver_provided": sorted(closure.driver_provided),
+                "symlinks_relinked": relinked,
+                "helper_executables": helpers,
+                "elf_runpaths_rewritten": patched,
+                "text_files_rewritten": rewritten,
+                "binary_files_rewritten": rewritten_binary,
+                "embedded_store_paths": leftover,
+                "deduplicated_files": linked,
+                "deduplicated_bytes": dedup_bytes,
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Single-host Slurm cluster used by the benchmark scripts.
+
+The Slurm recipe configures with --enable-multiple-slurmd, so one host can run
+slurmctld plus N slurmd instances, each emulating a node on its own port. The
+cluster uses auth/slurm with a generated key (Slurm 23.11+), so neither munged
+nor any network beyond localhost is needed. Run the benchmarks as root (or in
+a container) so slurmd can launch job steps.
+"""
+
+import getpass
+import os
+import re
+import secrets
+import shutil
+import signal
+import subprocess
+import time
+from pathlib import Path
+
+DEFAULT_CTLD_PORT = 16817
+DEFAULT_SLURMD_PORT = 17001
+
+
+class LoopbackCluster:
+    """Generate a slurm.conf for N emulated nodes on localhost and run the daemons."""
+
+    def __init__(
+        self,
+        prefix: Path,
+        workdir: Path,
+        nodes: int = 4,
+        cpus_per_node: int = 8,
+        ctld_port: int = DEFAULT_CTLD_PORT,
+        slurmd_port: int = DEFAULT_SLURMD_PORT,
+        extra_conf: dict[str, str] | None = None,
+        env: dict[str, str] | None = None,
+        jwt: bool = False,
+        extra_files: dict[str, str] | None = None,
+    ):
+        """Describe the cluster; nothing is written or started until start()."""
+        self.prefix = Path(prefix)
+        self.workdir = Path(workdir)
+        self.nodes = nodes
+        self.cpus_per_node = cpus_per_node
+        self.ctld_port = ctld_port
+        self.slurmd_port = slurmd_port
+        self.extra_conf = extra_conf or {}
+        self.jwt = jwt
+        self.extra_files = extra_files or {}
+        self.conf_path = self.workdir / "etc" / "slurm.conf"
+        # Job scripts run srun, sbcast, ... by name; take them from the prefix under test
+        path = os.pathsep.join(
+            [str(self.prefix / "bin"), str(self.prefix / "sbin"), os.environ.get("PATH", "")]
+        )
+        self.env = {**os.environ, "PATH": path, "SLURM_CONF": str(self.conf_path), **(env or {})}
+        self._procs: list[subprocess.Popen] = []
+        self.slurmctld: subprocess.Popen | None = None
+
+    @property
+    def node_names(self) -> str:
+        """Return the hostlist expression of the emulated nodes."""
+        return f"bench[1-{self.nodes}]"
+
+    def write_config(self):
+        """Create the state/spool directories, slurm.key and slurm.conf."""
+        if self.workdir.exists():
+            shutil.rmtree(self.workdir)
+        for sub in ("etc", "state", "spool", "log", "run"):
+            (self.workdir / sub).mkdir(parents=True)
+
+        # auth/slurm and cred/slurm read slurm.key next to slurm.conf.
+        key = self.workdir / "etc" / "slurm.key"
+        key.write_bytes(secrets.token_bytes(1024))
+        key.chmod(0o600)
+
+        jwt_conf = {}
+        if self.jwt:
+            jwt_key = self.workdir / "etc" / "jwt_hs256.key"
+            jwt_key.write_bytes(secrets.token_bytes(32))
+            jwt_key.chmod(0o600)
+            jwt_conf = {"AuthAltTypes": "auth/jwt", "AuthAltParameters": f"jwt_key={jwt_key}"}
+
+        user = getpass.getuser()
+        last_port = self.slurmd_port + self.nodes - 1
+        conf = {
+            "ClusterName": "bench",
+            "SlurmctldHost": "localhost",
+            "SlurmctldPort": str(self.ctld_port),
+            "SlurmUser": user,
+            "SlurmdUser": user,
+            "AuthType": "auth/slurm",
+            "CredType": "cred/slurm",
+            "StateSaveLocation": str(self.workdir / "state"),
+            "SlurmdSpoolDir": str(self.workdir / "spool" / "%n"),
+            "SlurmctldPidFile": str(self.workdir / "run" / "slurmctld.pid"),
+            "SlurmdPidFile": str(self.workdir / "run" / "slurmd-%n.pid"),
+            "SlurmctldLogFile": str(self.workdir / "log" / "slurmctld.log"),
+            "SlurmdLogFile": str(self.workdir / "log" / "slurmd-%n.log"),
+            "SlurmdParameters": "config_overrides",
+            "ProctrackType": "proctrack/linuxproc",
+            "TaskPlugin": "task/none",
+            "JobAcctGatherType": "jobacct_gather/none",
+            "AccountingStorageType": "accounting_storage/none",
+            "SelectType": "select/cons_tres",
+            "SelectTypeParameters": "CR_Core",
+            "SchedulerType": "sched/backfill",
+            "MpiDefault": "none",
+            "ReturnToService": "2",
+            "MaxJobCount": "1000000",
+            "MaxArraySize": "100001",
+            "MinJobAge": "2",
+            "SlurmctldDebug": "error",
+            "SlurmdDebug": "error",
+            **jwt_conf,
+            **self.extra_conf,
+        }
+        lines = [f"{k}={v}" for k, v in conf.items()]
+        lines.append(
+            f"NodeName={self.node_names} NodeHostname=localhost NodeAddr=127.0.0.1 "
+            f"Port=[{self.slurmd_port}-{last_port}] CPUs={self.cpus_per_node} RealMemory=1000 State=UNKNOWN"
+        )
+        lines.append(f"PartitionName=bench Nodes={self.node_names} Default=YES MaxTime=INFINITE State=UP")
+        self.conf_path.write_text("\n".join(lines) + "\n")
+
+        # Companion config files (mpi.conf, job_submit.lua, ...) next to slurm.conf
+        for name, content in self.extra_files.items():
+            (self.workdir / "etc" / name).write_text(content)
+
+    def command(self, name: str) -> str:
+        """Return the path of a Slurm binary from the prefix under test."""
+        for sub in ("bin", "sbin"):
+            candidate = self.prefix / sub / name
+            if candidate.exists():
+                return str(candidate)
+        raise FileNotFoundError(f"{name} not found in {self.prefix}/bin or {self.prefix}/sbin")
+
+    def version(self) -> str:
+        """Return the Slurm version string of the prefix under test."""
+        return self.run("sinfo", "--version").strip()
+
+    def run(self, *args: str, check: bool = True) -> str:
+        """Run a Slurm client command against the cluster and return its stdout."""
+        result = subprocess.run(
+            [self.command(args[0]), *args[1:]], env=self.env, check=check, capture_output=True, text=True
+        )
+        return result.stdout
+
+    def spawn(self, *args: str) -> subprocess.Popen:
+        """Start a long-running Slurm program (daemon) that is stopped together with the cluster."""
+        proc = subprocess.Popen(
+            [self.command(args[0]), *args[1:]],
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self._procs.append(proc)
+        return proc
+
+    def start(self, timeout: float = 60.0):
+        """Start slurmctld and one slurmd per emulated node, then wait for them to be idle."""
+        self.write_config()
+        self.slurmctld = self.spawn("slurmctld", "-D", "-i")
+        self._wait(lambda: "UP" in self.run("scontrol", "ping", check=False), timeout, "slurmctld")
+        for i in range(1, self.nodes + 1):
+            self.spawn("slurmd", "-D", "-N", f"bench{i}")
+        self._wait(self._all_nodes_idle, timeout, "slurmd nodes")
+
+    def token(self, username: str, lifespan: int = 3600) -> str:
+        """Issue a JWT for ``username`` with ``scontrol token`` (requires jwt=True)."""
+        output = self.run("scontrol", "token", f"username={username}", f"lifespan={lifespan}")
+        return output.strip().split("=", 1)[1]
+
+    def _all_nodes_idle(self) -> bool:
+        states = self.run("sinfo", "-h", "-N", "-o", "%t", check=False).split()
+        return len(states) == self.nodes and all(s == "idle" for s in states)
+
+    def wait_for_empty_queue(self, timeout: float = 600.0):
+        """Block until squeue reports no pending or running jobs; raise if slurmctld exits."""
+
+        def drained() -> bool:
+            if self.slurmctld.poll() is not None:
+                raise RuntimeError(
+                    f"slurmctld exited with status {self.slurmctld.returncode}; "
+                    f"see {self.workdir / 'log' / 'slurmctld.log'}"
+                )
+            result = subprocess.run(
+                [self.command("squeue"), "-h", "-o", "%i"], env=self.env, capture_output=True, text=True
+            )
+            return result.returncode == 0 and not result.stdout.strip()
+
+        self._wait(drained, timeout, "job queue")
+
+    @staticmethod
+    def _wait(predicate, timeout: float, what: str, interval: float = 0.2):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return
+            time.sleep(interval)
+        raise TimeoutError(f"timed out after {timeout:.0f}s waiting for {what}")
+
+    def slurmctld_rss_kib(self) -> dict[str, int]:
+        """Return current and peak resident set size of slurmctld in KiB."""
+        status = Path(f"/proc/{self.slurmctld.pid}/status").read_text()
+        rss = re.search(r"VmRSS:\s+(\d+)", status)
+        hwm = re.search(r"VmHWM:\s+(\d+)", status)
+        return {"rss_kib": int(rss.group(1)) if rss else 0, "peak_rss_kib": int(hwm.group(1)) if hwm else 0}
+
+    def sdiag(self) -> dict[str, int]:
+        """Return the main and backfill scheduler cycle statistics (microseconds) from sdiag."""
+        output = self.run("sdiag", check=False)
+        stats = {}
+        sections = {"Main schedule statistics": "main", "Backfilling stats": "backfill"}
+        section = None
+        for line in output.splitlines():
+            stripped = line.strip()
+            for header, name in sections.items():
+                if stripped.startswith(header):
+                    section = name
+            match = re.match(r"(Last cycle|Max cycle|Mean cycle|Total cycles):\s+(\d+)", stripped)
+            if section and match:
+                key = match.group(1).lower().replace(" ", "_")
+                stats[f"{section}_{key}"] = int(match.group(2))
+        return stats
+
+    def stop(self):
+        """Stop all daemons started by this cluster."""
+        for proc in reversed(self._procs):
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+        for proc in self._procs:
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self._procs.clear()
+
+    def __enter__(self):
+        """Start the cluster; stop whatever did start if it does not come up."""
+        try:
+            self.start()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        """Stop the cluster."""
+        self.stop()
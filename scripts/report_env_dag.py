@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the build DAG of a concretized environment with separate builds.
+
+Reads <env>/spack.lock (run ``spack concretize`` first) for the unified DAG,
+then concretizes every root on its own with ``spack spec --json`` and reports
+how many nodes each approach has to build, which packages are shared by
+several roots and which still have more than one configuration in the
+environment. Example:
+
+    ./scripts/report_env_dag.py environments/slurm-all-versions
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+
+def unified_dag(lockfile: Path) -> tuple[list[str], dict[str, str]]:
+    """Return the root spec strings and a hash -> package name map from a spack.lock."""
+    lock = json.loads(lockfile.read_text())
+    roots = [root["spec"] for root in lock["roots"]]
+    nodes = {dag_hash: node["name"] for dag_hash, node in lock["concrete_specs"].items()}
+    return roots, nodes
+
+
+def separate_dag_size(spack: str, env_dir: Path, root: str) -> int:
+    """Concretize ``root`` alone (with the environment's config) and count its nodes."""
+    output = subprocess.run(
+        [spack, "-e", str(env_dir), "spec", "--json", root], check=True, capture_output=True, text=True
+    ).stdout
+    return len(json.loads(output)["spec"]["nodes"])
+
+
+def main():
+    """Print the DAG size report as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("env", type=Path, help="environment directory containing spack.yaml/spack.lock")
+    parser.add_argument("--spack", default="spack", help="spack executable (default: %(default)s)")
+    args = parser.parse_args()
+
+    lockfile = args.env / "spack.lock"
+    if not lockfile.exists():
+        parser.error(f"{lockfile} not found; run `spack -e {args.env} concretize` first")
+
+    roots, nodes = unified_dag(lockfile)
+    separate = {root: separate_dag_size(args.spack, args.env, root) for root in roots}
+    per_name = Counter(nodes.values())
+
+    separate_total = sum(separate.values())
+    report = {
+        "roots": len(roots),
+        "unified_nodes": len(nodes),
+        "separate_nodes": separate_total,
+        "separate_nodes_per_root": separate,
+        "nodes_saved": separate_total - len(nodes),
+        "unified_fraction": round(len(nodes) / separate_total, 3) if separate_total else None,
+        "duplicated_packages": {name: count for name, count in sorted(per_name.items()) if count > 1},
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
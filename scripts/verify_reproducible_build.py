@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Copyright 2025 Vantage Compute Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Build a spec twice from different stage directories and diff the install trees.
+
+Identical trees mean identical buildcache tarballs. Typical use:
+
+    ./scripts/verify_reproducible_build.py "slurm_factory.slurm@25-11-6-1 +reproducible"
+
+Two already-built prefixes (e.g. from different build hosts) can be compared
+directly with ``--compare PREFIX_A PREFIX_B``.
+"""
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Spack writes build logs, timings and the spec into <prefix>/.spack; these
+# are expected to differ between builds and are not part of the buildcache
+# payload that nodes consume.
+IGNORED_DIRS = {".spack"}
+
+
+def snapshot_tree(prefix: Path) -> dict[str, str]:
+    """Return a mapping of relative path to content digest (or symlink target)."""
+    manifest = {}
+    for path in sorted(prefix.rglob("*")):
+        rel = path.relative_to(prefix)
+        if rel.parts[0] in IGNORED_DIRS:
+            continue
+        if path.is_symlink():
+            manifest[str(rel)] = f"symlink:{path.readlink()}"
+        elif path.is_file():
+            manifest[str(rel)] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return manifest
+
+
+def diff_manifests(first: dict[str, str], second: dict[str, str]) -> dict[str, list[str]]:
+    """Compare two tree snapshots."""
+    return {
+        "only_in_first": sorted(set(first) - set(second)),
+        "only_in_second": sorted(set(second) - set(first)),
+        "differing": sorted(p for p in set(first) & set(second) if first[p] != second[p]),
+    }
+
+
+def spack_install(spack: str, spec: str, stage_dir: Path) -> Path:
+    """Build ``spec`` from source in ``stage_dir`` and return its install prefix."""
+    subprocess.run(
+        [
+            spack,
+            "-c",
+            f"config:build_stage:[{stage_dir}]",
+            "install",
+            "--overwrite",
+            "--yes-to-all",
+            "--no-cache",
+            spec,
+        ],
+        check=True,
+    )
+    prefix = subprocess.run(
+        [spack, "location", "-i", spec], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    return Path(prefix)
+
+
+def main():
+    """Run the double build (or plain comparison) and report differences as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("spec", nargs="?", help="spec to build twice")
+    parser.add_argument("--compare", nargs=2, metavar="PREFIX", help="diff two existing prefixes instead")
+    parser.add_argument("--spack", default="spack", help="spack executable (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.compare:
+        first = snapshot_tree(Path(args.compare[0]))
+        second = snapshot_tree(Path(args.compare[1]))
+    elif args.spec:
+        # Different stage roots make any leaked build path show up as a diff.
+        with tempfile.TemporaryDirectory(prefix="repro-a-") as stage_a:
+            prefix = spack_install(args.spack, args.spec, Path(stage_a))
+            first = snapshot_tree(prefix)
+        with tempfile.TemporaryDirectory(prefix="repro-build-b-") as stage_b:
+            prefix = spack_install(args.spack, args.spec, Path(stage_b))
+            second = snapshot_tree(prefix)
+    else:
+        parser.error("either a spec or --compare PREFIX_A PREFIX_B is required")
+
+    result = diff_manifests(first, second)
+    result["files"] = len(first)
+    result["reproducible"] = not (result["only_in_first"] or result["only_in_second"] or result["differing"])
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["reproducible"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Post-link code layout optimization with llvm-bolt, trained on a loopback Slurm workload."""
+
+import getpass
+import glob
+import os
+import secrets
+import shutil
+import signal
+import socket
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import spack.llnl.util.tty as tty
+import spack.util.executable as exe
+from spack.package import *
+
+#: Seconds of training workload; overridable for slow or very fast build hosts
+TRAIN_SECONDS_ENV = "SLURM_FACTORY_BOLT_TRAIN_SECONDS"
+DEFAULT_TRAIN_SECONDS = 30
+
+#: Layout passes for the final rewrite (block order, function order, hot/cold split, folding)
+BOLT_OPTIONS = (
+    "-reorder-blocks=ext-tsp",
+    "-reorder-functions=hfsort",
+    "-split-functions",
+    "-split-all-cold",
+    "-split-eh",
+    "-icf=1",
+    "-use-gnu-stack",
+    "-update-debug-sections",
+    "-dyno-stats",
+)
+
+#: Build directories whose Makefiles link the optimized targets (slurmctld, slurmd, libslurmfull)
+TARGET_BUILD_DIRS = (
+    join_path("src", "slurmctld"),
+    join_path("src", "slurmd", "slurmd"),
+    join_path("src", "api"),
+)
+
+#: Client calls that keep slurmctld's RPC, scheduling and state code busy during training
+WORKLOAD = (
+    ("sbatch", "--hold", "-J", "bolt-train", "-o", "/dev/null", "--wrap", "true"),
+    ("sbatch", "--hold", "-J", "bolt-train", "-o", "/dev/null", "--array=1-20", "--wrap", "true"),
+    ("squeue", "-h"),
+    ("squeue", "-h", "--states=PD", "-o", "%i %j %T %r"),
+    ("scontrol", "show", "job"),
+    ("sinfo", "-h", "-N"),
+    ("scontrol", "show", "node"),
+    ("scancel", "--name=bolt-train", "--state=PD", "--partition=bolt"),
+)
+
+
+class BoltOptimizer:
+    """
+    Rewrite slurmctld, slurmd and libslurmfull with a profile-guided code layout.
+
+    The targets are linked with --emit-relocs so llvm-bolt can move code
+    freely; the ~200 plugins and the client commands are linked as usual.
+    llvm-bolt updates the DWARF of the functions it moves, so perf, gdb
+    and +separate_debug keep working on the rewritten files. After install,
+    the original files are copied into the stage, and a profile is
+    collected by running the installed daemons against a one-node loopback
+    cluster under a mix of submit and query traffic:
+
+    * ``bolt=instrument`` rewrites the targets with BOLT instrumentation
+      first. Each process dumps a profile at exit, and those profiles are
+      merged per target with merge-fdata. No hardware support is needed.
+    * ``bolt=sample`` attaches ``perf record`` to the daemons, with LBR
+      branch stacks when the CPU has them (plain IP samples otherwise), and
+      converts the data with perf2bolt.
+
+    Each target is then rewritten from its original copy using that
+    profile. A target without profile data keeps its original file. Any
+    failure restores every original before the error propagates.
+    """
+
+    def __init__(self, pkg):
+        """Bind the optimizer to the package instance being built."""
+        self.pkg = pkg
+        self.mode = pkg.spec.variants["bolt"].value
+
+    @property
+    def enabled(self):
+        """True for bolt=instrument and bolt=sample."""
+        return self.mode != "none"
+
+    @property
+    def compile_flags(self):
+        """Compiler flags for a BOLT-friendly layout; GCC's own hot/cold split gets in BOLT's way."""
+        if not self.enabled or not self.pkg.spec.satisfies("%gcc"):
+            return []
+        return ["-fno-reorder-blocks-and-partition"]
+
+    def add_link_flags(self):
+        """
+        Link only the targets with --emit-relocs, which llvm-bolt needs to relocate functions.
+
+        Appends the flag to LDFLAGS in the generated Makefiles of the target
+        build directories. Added through the compiler wrapper, it would keep
+        the static relocations in every plugin as well.
+        """
+        if not self.enabled:
+            return
+        for build_dir in TARGET_BUILD_DIRS:
+            makefile = join_path(self.pkg.build_directory, build_dir, "Makefile")
+            filter_file(r"^(LDFLAGS = .*)$", r"\1 -Wl,--emit-relocs", makefile, backup=False)
+
+    @property
+    def workdir(self):
+        """Scratch directory for originals, profiles and the training cluster."""
+        return join_path(self.pkg.stage.path, "bolt")
+
+    def tool(self, name):
+        """Return an executable from the llvm dependency, falling back to PATH."""
+        path = join_path(self.pkg.spec["llvm"].prefix.bin, name)
+        if os.path.exists(path):
+            return Executable(path)
+        found = exe.which(name)
+        if not found:
+            raise InstallError(f"{name} not found; bolt= needs an LLVM built with BOLT (LLVM 16 or newer)")
+        return found
+
+    def targets(self):
+        """Return the real paths of the files to optimize."""
+        prefix = self.pkg.prefix
+        paths = [join_path(prefix.sbin, "slurmctld"), join_path(prefix.sbin, "slurmd")]
+        # Absent with ~shared_libslurm, where libslurmfull is inside the daemons
+        paths += glob.glob(join_path(prefix.lib, "slurm", "libslurmfull*.so"))
+        return sorted({os.path.realpath(p) for p in paths if os.path.exists(p)})
+
+    def run(self):
+        """Profile the installed daemons and rewrite them; restore the originals on failure."""
+        if not self.enabled:
+            return
+        llvm_bolt = self.tool("llvm-bolt")
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        mkdirp(self.workdir)
+
+        originals = {}
+        for target in self.targets():
+            originals[target] = join_path(self.workdir, os.path.basename(target) + ".orig")
+            shutil.copy2(target, originals[target])
+
+        try:
+            if self.mode == "instrument":
+                profiles = self._instrumented_profiles(llvm_bolt, originals)
+            else:
+                profiles = self._sampled_profiles(originals)
+
+            for target, original in originals.items():
+                name = os.path.basename(target)
+                profile = profiles.get(target)
+                if not profile or not os.path.getsize(profile):
+                    tty.warn(f"No BOLT profile for {name}; keeping the original layout")
+                    shutil.copy2(original, target)
+                    continue
+                log = join_path(self.workdir, f"{name}.bolt.log")
+                with open(log, "w") as f:
+                    llvm_bolt(original, "-o", target, f"-data={profile}", *BOLT_OPTIONS, output=f, error=f)
+                tty.msg(
+                    f"✓ BOLT-optimized {name} ({os.path.getsize(original) / 1048576:.1f} MiB -> "
+                    f"{os.path.getsize(target) / 1048576:.1f} MiB, dyno-stats in {log})"
+                )
+        except Exception:
+            for target, original in originals.items():
+                shutil.copy2(original, target)
+            tty.warn("BOLT optimization failed; restored the original binaries")
+            raise
+
+    def _instrumented_profiles(self, llvm_bolt, originals):
+        """Install instrumented targets, train, and merge the per-process profiles."""
+        merge_fdata = self.tool("merge-fdata")
+        for target, original in originals.items():
+            out_dir = join_path(self.workdir, "profiles", os.path.basename(target))
+            mkdirp(out_dir)
+            llvm_bolt(
+                original,
+                "-instrument",
+                f"--instrumentation-file={join_path(out_dir, 'prof')}",
+                "--instrumentation-file-append-pid",
+                "-o",
+                target,
+                output=str,
+                error=str,
+            )
+
+        self._train()
+
+        profiles = {}
+        for target in originals:
+            name = os.path.basename(target)
+            dumps = sorted(glob.glob(join_path(self.workdir, "profiles", name, "prof*")))
+            if not dumps:
+                continue
+            profiles[target] = join_path(self.workdir, f"{name}.fdata")
+            with open(profiles[target], "w") as f:
+                merge_fdata(*dumps, output=f, error=str)
+        return profiles
+
+    def _sampled_profiles(self, originals):
+        """Train under perf record and convert the samples with perf2bolt."""
+        perf2bolt = self.tool("perf2bolt")
+        perf_data, lbr = self._train(perf=True)
+        if not lbr:
+            tty.warn("perf has no branch stack (LBR) support here; using plain IP samples")
+
+        profiles = {}
+        for target, original in originals.items():
+            profiles[target] = join_path(self.workdir, f"{os.path.basename(target)}.fdata")
+            args = ["-p", perf_data, "-o", profiles[target], original]
+            perf2bolt(*(args if lbr else ["-nl", *args]), output=str, error=str)
+        return profiles
+
+    @staticmethod
+    def _free_port():
+        """Return a TCP port on localhost that is currently unused."""
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+    def _write_config(self, cluster):
+        """Write a one-node auth/slurm configuration under ``cluster``; return SLURM_CONF."""
+        for sub in ("etc", "state", "spool", "log"):
+            mkdirp(join_path(cluster, sub))
+        key = join_path(cluster, "etc", "slurm.key")
+        with open(key, "wb") as f:
+            f.write(secrets.token_bytes(1024))
+        os.chmod(key, 0o600)
+
+        user = getpass.getuser()
+        conf = {
+            "ClusterName": "bolt",
+            "SlurmctldHost": "localhost",
+            "SlurmctldPort": str(self._free_port()),
+            "SlurmUser": user,
+            "SlurmdUser": user,
+            "AuthType": "auth/slurm",
+            "CredType": "cred/slurm",
+            "StateSaveLocation": join_path(cluster, "state"),
+            "SlurmdSpoolDir": join_path(cluster, "spool"),
+            "SlurmctldPidFile": join_path(cluster, "slurmctld.pid"),
+            "SlurmdPidFile": join_path(cluster, "slurmd.pid"),
+            "SlurmctldLogFile": join_path(cluster, "log", "slurmctld.log"),
+            "SlurmdLogFile": join_path(cluster, "log", "slurmd.log"),
+            "ProctrackType": "proctrack/linuxproc",
+            "TaskPlugin": "task/none",
+            "JobAcctGatherType": "jobacct_gather/none",
+            "AccountingStorageType": "accounting_storage/none",
+            "SelectType": "select/cons_tres",
+            "SchedulerType": "sched/backfill",
+            "MpiDefault": "none",
+            "ReturnToService": "2",
+            "MinJobAge": "2",
+        }
+        lines = [f"{k}={v}" for k, v in conf.items()]
+        lines.append(
+            f"NodeName=bolt1 NodeHostname=localhost NodeAddr=127.0.0.1 Port={self._free_port()} "
+            "CPUs=4 RealMemory=1000 State=UNKNOWN"
+        )
+        lines.append("PartitionName=bolt Nodes=bolt1 Default=YES MaxTime=INFINITE State=UP")
+        conf_path = join_path(cluster, "etc", "slurm.conf")
+        with open(conf_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return conf_path
+
+    def _train(self, perf=False):
+        """
+        Run the daemons from the install prefix under WORKLOAD traffic.
+
+        With ``perf`` the daemons are sampled and (perf.data path, LBR used)
+        is returned.
+        """
+        prefix = self.pkg.prefix
+        cluster = join_path(self.workdir, "cluster")
+        env = {**os.environ, "SLURM_CONF": self._write_config(cluster)}
+        seconds = int(os.environ.get(TRAIN_SECONDS_ENV, DEFAULT_TRAIN_SECONDS))
+
+        def client(*args):
+            return subprocess.run(
+                [join_path(prefix.bin, args[0]), *args[1:]], env=env, capture_output=True, text=True
+            )
+
+        daemons = [
+            subprocess.Popen([join_path(prefix.sbin, "slurmctld"), "-D", "-i"], env=env),
+            subprocess.Popen([join_path(prefix.sbin, "slurmd"), "-D", "-N", "bolt1"], env=env),
+        ]
+        recorder, result = None, None
+        try:
+            deadline = time.monotonic() + 60
+            while "UP" not in client("scontrol", "ping").stdout:
+                if time.monotonic() > deadline or daemons[0].poll() is not None:
+                    raise InstallError(f"slurmctld did not start for BOLT training; see {cluster}/log")
+                time.sleep(0.2)
+
+            if perf:
+                recorder, result = self._start_perf([str(d.pid) for d in daemons])
+
+            tty.msg(f"Collecting BOLT profile ({self.mode}) for {seconds}s")
+            stop = time.monotonic() + seconds
+
+            def worker(i):
+                calls = 0
+                while time.monotonic() < stop:
+                    client(*WORKLOAD[(i + calls) % len(WORKLOAD)])
+                    calls += 1
+                return calls
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                tty.msg(f"  {sum(pool.map(worker, range(8)))} client calls")
+        finally:
+            if recorder is not None:
+                recorder.send_signal(signal.SIGINT)
+                recorder.wait(timeout=120)
+            # Instrumented daemons write their profile on a clean exit
+            for daemon in reversed(daemons):
+                if daemon.poll() is None:
+                    daemon.send_signal(signal.SIGTERM)
+            for daemon in daemons:
+                try:
+                    daemon.wait(timeout=60)
+                except subprocess.TimeoutExpired:
+                    daemon.kill()
+        return result
+
+    def _start_perf(self, pids):
+        """Attach perf record to ``pids``, with branch stacks if the CPU supports them."""
+        perf = exe.which("perf")
+        if not perf:
+            raise InstallError("bolt=sample needs perf in PATH")
+        perf_data = join_path(self.workdir, "perf.data")
+        # cpu-clock is the fallback for VMs without hardware counters
+        for lbr, event in ((True, "cycles:u"), (False, "cycles:u"), (False, "cpu-clock")):
+            argv = [perf.path, "record", "-q", "-e", event, "-o", perf_data, "-p", ",".join(pids)]
+            if lbr:
+                argv[2:2] = ["-j", "any,u"]
+            recorder = subprocess.Popen(argv, stderr=subprocess.DEVNULL)
+            time.sleep(1)
+            if recorder.poll() is None:
+                return recorder, (perf_data, lbr)
+        raise InstallError("perf record could not attach to the Slurm daemons")
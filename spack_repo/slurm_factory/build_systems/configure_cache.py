@@ -0,0 +1,181 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Opt-in autoconf ``config.cache`` shared between rebuilds of an Autotools package."""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import spack.llnl.util.tty as tty
+from spack.package import *
+
+#: Directory holding the cache entries; the cache is disabled when unset
+CACHE_DIR_ENV = "SLURM_FACTORY_CONFIGURE_CACHE"
+
+#: Environment variables configure records as precious (AC_ARG_VAR) and compares on reload
+PRECIOUS_ENV = ("CC", "CPP", "CFLAGS", "CPPFLAGS", "LDFLAGS", "LIBS", "PKG_CONFIG", "PKG_CONFIG_PATH")
+
+#: Flags Spack's compiler wrapper injects into every compile and link, including configure's tests
+WRAPPER_FLAGS_ENV = ("SPACK_CFLAGS", "SPACK_CXXFLAGS", "SPACK_CPPFLAGS", "SPACK_LDFLAGS", "SPACK_LDLIBS")
+
+#: Placeholder for the stage directory in stored entries and in the key
+STAGE_PLACEHOLDER = "@SPACK_STAGE@"
+
+
+class ConfigureCache:
+    """
+    Seed ``configure --cache-file`` from a cache keyed on everything configure sees.
+
+    Enabled by pointing SLURM_FACTORY_CONFIGURE_CACHE at a writable directory.
+    It is deliberately not a variant, so turning it on does not change any
+    spec hash. The key covers the configure script itself, the compiler, the
+    DAG hashes of the build/link dependencies, the configure arguments, the
+    flags flag_handler hands to configure (read from the builder) or to the
+    compiler wrapper, and the precious environment variables. Variants that
+    change flags (build_profile, profiling, linker) get their own entries,
+    while those that do not change what configure sees (slim,
+    separate_debug, ...) share one.
+
+    The stage directory is part of PKG_CONFIG_PATH for some packages and
+    differs between specs, so it is stored as a placeholder and substituted
+    back when the entry is seeded. An entry is evicted, and configure rerun
+    from scratch, when configure fails on it or the caller's validation
+    rejects the result. Entries are only written after a validated run.
+    """
+
+    def __init__(self, pkg):
+        """Bind the cache to the package instance being built."""
+        self.pkg = pkg
+        self.root = os.environ.get(CACHE_DIR_ENV)
+
+    @property
+    def enabled(self):
+        """True when a cache directory is configured."""
+        return bool(self.root)
+
+    @property
+    def build_file(self):
+        """The config.cache configure reads and writes inside the stage."""
+        return join_path(self.pkg.stage.path, "config.cache")
+
+    @property
+    def args(self):
+        """Extra configure arguments; empty when the cache is disabled."""
+        return [f"--cache-file={self.build_file}"] if self.enabled else []
+
+    def _normalize(self, value):
+        """Replace the stage directory, which differs between specs, with a placeholder."""
+        return str(value).replace(self.pkg.stage.path, STAGE_PLACEHOLDER)
+
+    def key(self):
+        """Hash of every input that can change a cached configure result."""
+        pkg = self.pkg
+        configure_script = join_path(pkg.stage.source_path, "configure")
+        with open(configure_script, "rb") as f:
+            configure_sha = hashlib.sha256(f.read()).hexdigest()
+
+        deps = sorted(
+            f"{dep.name}/{dep.dag_hash()}" for dep in pkg.spec.dependencies(deptype=("build", "link"))
+        )
+        args = [a for a in pkg.configure_args() if not a.startswith("--cache-file=")]
+        # flag_handler's build-system flags live on the builder, not on the package
+        builder = getattr(pkg, "builder", pkg)
+        env_vars = (*PRECIOUS_ENV, *WRAPPER_FLAGS_ENV)
+        inputs = {
+            "package": pkg.name,
+            "configure": configure_sha,
+            "arch": str(pkg.spec.architecture),
+            "compiler": str(getattr(pkg.compiler, "cc", "")),
+            "dependencies": deps,
+            "args": [self._normalize(a) for a in args],
+            "flags": [self._normalize(f) for f in getattr(builder, "configure_flag_args", [])],
+            "compiler_flags": str(pkg.spec.compiler_flags),
+            "env": {v: self._normalize(os.environ[v]) for v in env_vars if v in os.environ},
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:32]
+
+    @property
+    def entry(self):
+        """Path of the cache entry for this build."""
+        return join_path(self.root, f"{self.pkg.name}-{self.pkg.version}-{self.key()}.cache")
+
+    def seed(self):
+        """Copy a matching entry into the stage; return True on a cache hit."""
+        if not self.enabled:
+            return False
+        entry = self.entry
+        if not os.path.exists(entry):
+            tty.msg(f"configure cache miss: {os.path.basename(entry)}")
+            return False
+        with open(entry) as f:
+            content = f.read().replace(STAGE_PLACEHOLDER, self.pkg.stage.path)
+        with open(self.build_file, "w") as f:
+            f.write(content)
+        tty.msg(f"configure cache hit: {os.path.basename(entry)}")
+        return True
+
+    def store(self):
+        """Atomically publish the stage config.cache as the entry for this build."""
+        if not self.enabled or not os.path.exists(self.build_file):
+            return
+        with open(self.build_file) as f:
+            content = f.read()
+        if "ac_cv_" not in content:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self._normalize(content))
+        os.replace(tmp, self.entry)
+        tty.msg(f"Stored configure cache {self.entry}")
+
+    def evict(self):
+        """Drop the entry and the stage copy so configure starts from scratch."""
+        for path in (self.entry, self.build_file):
+            if os.path.exists(path):
+                os.remove(path)
+        tty.warn(f"Evicted configure cache {self.entry}")
+
+    def run(self, configure, validate=None):
+        """
+        Run ``configure`` through the cache.
+
+        ``validate`` is called after configure and returns False when the
+        results are unusable. Results from a cached run that fail or do not
+        validate are evicted and configure is rerun without them.
+        """
+        validate = validate or (lambda: True)
+        hit = self.seed()
+        try:
+            configure()
+        except ProcessError:
+            if not hit:
+                raise
+            tty.warn("configure failed on cached results, retrying without the cache")
+            self.evict()
+            configure()
+            hit = False
+
+        valid = validate()
+        if hit and not valid:
+            tty.warn("Cached configure results failed validation, retrying without the cache")
+            self.evict()
+            configure()
+            valid = validate()
+
+        if valid:
+            self.store()
+        elif self.enabled:
+            tty.warn("Not storing configure cache for a run that failed validation")
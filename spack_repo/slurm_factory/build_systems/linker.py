@@ -0,0 +1,54 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Linker selection (``linker=default|mold|lld``) shared by the link-heavy recipes."""
+
+from spack.package import *
+
+
+class LinkerPackage(PackageBase):
+    """
+    Mixin adding a ``linker`` variant, in the style of CudaPackage.
+
+    ``default`` keeps the toolchain's linker (GNU ld with GCC). mold and lld
+    are build dependencies selected with ``-fuse-ld=``: recipes add
+    linker_flags to ldflags in their flag_handler, and to any link line they
+    run with the real compiler instead of Spack's wrapper. Both linkers honour
+    the -rpath/--enable-new-dtags flags from the wrapper, so the patchelf RPATH
+    fixups after install see the same dynamic sections as with GNU ld.
+
+    Propagate it to the whole stack with ``linker==mold``.
+    """
+
+    variant(
+        "linker",
+        default="default",
+        values=("default", "mold", "lld"),
+        multi=False,
+        description="Linker for every link step (mold and lld are much faster than GNU ld)",
+    )
+
+    depends_on("mold", type="build", when="linker=mold")
+    depends_on("llvm+lld", type="build", when="linker=lld")
+
+    conflicts("%gcc@:12.0", when="linker=mold", msg="-fuse-ld=mold needs GCC 12.1 or newer")
+    conflicts("%gcc@:8", when="linker=lld", msg="-fuse-ld=lld needs GCC 9 or newer")
+    conflicts("platform=darwin", when="linker=mold", msg="mold only links ELF")
+    conflicts("platform=windows", when="linker=mold")
+    conflicts("platform=windows", when="linker=lld")
+
+    @property
+    def linker_flags(self):
+        """``-fuse-ld=`` flag for the selected linker; empty for the toolchain default."""
+        linker = self.spec.variants["linker"].value
+        return [] if linker == "default" else [f"-fuse-ld={linker}"]
@@ -0,0 +1,60 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Frame pointers and unwind tables (``+profiling``) shared by Slurm and its TLS/HTTP stack."""
+
+from spack.package import *
+
+
+class ProfilingPackage(PackageBase):
+    """
+    Mixin adding a ``profiling`` variant, in the style of CudaPackage.
+
+    ``+profiling`` keeps the frame pointer in every function, including
+    leaf functions on x86_64 and aarch64, and always emits asynchronous
+    unwind tables (.eh_frame). perf and eBPF stack samplers can then walk
+    complete call stacks without DWARF unwinding or debug packages.
+
+    Recipes add profiling_flags to cflags through the compiler wrapper, not
+    as CFLAGS for the build system. That way configure still picks its
+    default optimization level, and the profiled code is the code that runs
+    in production. None of the recipes strip .symtab or .eh_frame at
+    install time; +separate_debug only moves the DWARF sections.
+
+    Propagate it to openssl, curl and s2n-tls with ``profiling==True``.
+    """
+
+    variant(
+        "profiling",
+        default=False,
+        description="Keep frame pointers and unwind tables for perf/eBPF stack sampling (same -O level)",
+    )
+
+    requires(
+        "%gcc",
+        "%clang",
+        policy="one_of",
+        when="+profiling",
+        msg="+profiling flags are only tested with GCC and Clang",
+    )
+
+    @property
+    def profiling_flags(self):
+        """Frame-pointer and unwind-table compiler flags; empty for ~profiling."""
+        if not self.spec.satisfies("+profiling"):
+            return []
+        flags = ["-fno-omit-frame-pointer", "-fasynchronous-unwind-tables"]
+        # Leaf functions only omit the frame pointer on these targets
+        if self.spec.satisfies("target=x86_64:") or self.spec.satisfies("target=aarch64:"):
+            flags.append("-mno-omit-leaf-frame-pointer")
+        return flags
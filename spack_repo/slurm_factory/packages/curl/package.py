@@ -12,10 +12,13 @@ from spack_repo.builtin.build_systems.autotools import AutotoolsBuilder, Autotoo
 from spack_repo.builtin.build_systems.cmake import CMakeBuilder, CMakePackage
 from spack_repo.builtin.build_systems.nmake import NMakeBuilder, NMakePackage
 
+from spack_repo.slurm_factory.build_systems.linker import LinkerPackage
+from spack_repo.slurm_factory.build_systems.profiling import ProfilingPackage
+
 IS_WINDOWS = sys.platform == "win32"
 
 
-class Curl(NMakePackage, AutotoolsPackage, CMakePackage):
+class Curl(NMakePackage, AutotoolsPackage, CMakePackage, LinkerPackage, ProfilingPackage):
     """
     cURL is an open source command line tool and library for transferring data with URL syntax.
 
@@ -157,8 +160,12 @@ class Curl(NMakePackage, AutotoolsPackage, CMakePackage):
     def flag_handler(self, name, flags):
         build_system_flags = []
         spec = self.spec
-        if name == "cflags" and (spec.satisfies("%intel") or spec.satisfies("%oneapi")):
-            build_system_flags = ["-we147"]
+        if name == "cflags":
+            flags = flags + self.profiling_flags
+            if spec.satisfies("%intel") or spec.satisfies("%oneapi"):
+                build_system_flags = ["-we147"]
+        elif name == "ldflags":
+            flags = flags + self.linker_flags
         return flags, None, build_system_flags
 
 
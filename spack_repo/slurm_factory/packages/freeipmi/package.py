@@ -7,6 +7,8 @@ from spack.package import *
 from spack_repo.builtin.build_systems.autotools import AutotoolsPackage
 from spack_repo.builtin.build_systems.gnu import GNUMirrorPackage
 
+from spack_repo.slurm_factory.build_systems.configure_cache import ConfigureCache
+
 
 class Freeipmi(AutotoolsPackage, GNUMirrorPackage):
     """
@@ -31,4 +33,10 @@ class Freeipmi(AutotoolsPackage, GNUMirrorPackage):
     depends_on("libgcrypt")
 
     def configure_args(self):
-        return ["--with-systemdsystemunitdir=no"]
+        # Opt-in config.cache (SLURM_FACTORY_CONFIGURE_CACHE)
+        return ["--with-systemdsystemunitdir=no"] + ConfigureCache(self).args
+
+    def configure(self, spec, prefix):
+        """Run configure through the optional config.cache."""
+        parent_configure = super().configure
+        ConfigureCache(self).run(lambda: parent_configure(spec, prefix))
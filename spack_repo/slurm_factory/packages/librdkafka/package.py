@@ -0,0 +1,65 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from spack.package import *
+from spack_repo.builtin.packages.librdkafka.package import Librdkafka as BuiltinLibrdkafka
+
+
+class Librdkafka(BuiltinLibrdkafka):
+    """
+    librdkafka trimmed and tuned for Slurm's jobcomp/kafka plugin.
+
+    Extends the builtin recipe (versions and checksums are inherited) with a
+    fixed feature set: zstd and lz4 compression from external libraries,
+    optional TLS to the brokers, and no Cyrus SASL/GSSAPI, libcurl (OIDC) or
+    zlib. All objects are built position independent so librdkafka.a can be
+    linked into the jobcomp_kafka.so plugin; see static_link_flags.
+    """
+
+    variant("ssl", default=True, description="TLS connections to the brokers (OpenSSL)")
+
+    depends_on("zstd", type=("build", "link"))
+    depends_on("lz4", type=("build", "link"))
+    depends_on("openssl", type=("build", "link"), when="+ssl")
+
+    def flag_handler(self, name, flags):
+        """Build every object with PIC so the static archive can go into a plugin."""
+        if name == "cflags":
+            flags.append(self.compiler.cc_pic_flag)
+        elif name == "cxxflags":
+            flags.append(self.compiler.cxx_pic_flag)
+        return (flags, None, None)
+
+    def configure_args(self):
+        """Enable only the codecs and transports the jobcomp plugin uses."""
+        args = [
+            "--enable-zstd",
+            "--enable-lz4-ext",
+            "--disable-zlib",
+            "--disable-gssapi",
+        ]
+        args.append("--enable-ssl" if self.spec.satisfies("+ssl") else "--disable-ssl")
+        # OIDC token refresh over libcurl was added in 2.0
+        if self.spec.satisfies("@2:"):
+            args.append("--disable-curl")
+        return args
+
+    @property
+    def static_link_flags(self):
+        """Link line for librdkafka.a plus the libraries it was configured against."""
+        flags = [join_path(self.prefix.lib, "librdkafka.a")]
+        deps = ["zstd", "lz4"] + (["openssl"] if self.spec.satisfies("+ssl") else [])
+        for dep in deps:
+            flags.append(self.spec[dep].libs.ld_flags)
+        flags.extend(["-lpthread", "-lm", "-ldl", "-lrt"])
+        return " ".join(flags)
@@ -0,0 +1,119 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import glob
+import os
+import platform
+import re
+import zipfile
+
+import spack.llnl.util.tty as tty
+from spack.package import *
+from spack_repo.builtin.build_systems.generic import Package
+
+# NVIDIA publishes nvml.h on PyPI as a header-only wheel (nvidia-nvml-dev).
+# This is a few hundred KB instead of a multi-GB CUDA toolkit.
+_versions = {
+    "13.4.92": {
+        "x86_64": (
+            "https://files.pythonhosted.org/packages/d2/3f/00af0f6c60f03c6accffe0558f24fb311dc2c7352f9aadcc0db9a6b32efe/nvidia_nvml_dev-13.4.92-py3-none-manylinux2014_x86_64.manylinux_2_17_x86_64.whl",
+            "90b65cebefd02a1e695675177c9d7886f48322906ce5c03398e8cb27cc5ad2d6",
+        ),
+        "aarch64": (
+            "https://files.pythonhosted.org/packages/6e/ca/72d097a2beb304fe52d0fb29809d9e4ffb0188cc01ab12e045a75f77e2a8/nvidia_nvml_dev-13.4.92-py3-none-manylinux2014_aarch64.manylinux_2_17_aarch64.whl",
+            "2b4178b2a116c3c0123b54d760e280036bc84536a222e3a73f5020f7aa03a6fb",
+        ),
+    },
+    "12.9.79": {
+        "x86_64": (
+            "https://files.pythonhosted.org/packages/8d/86/2ebe051124f0910422483094101687a06cf162aea1777338a8cc73a4115a/nvidia_nvml_dev_cu12-12.9.79-py3-none-manylinux2014_x86_64.manylinux_2_17_x86_64.whl",
+            "8bb367913c62cb65be9ae386c58dbf573f1f9e2f01cae54abb87bf5f63c6069e",
+        ),
+        "aarch64": (
+            "https://files.pythonhosted.org/packages/06/2e/cc30e99cd44837d159d3fe705290f5e2433524a883d9bf08613a6f84fd79/nvidia_nvml_dev_cu12-12.9.79-py3-none-manylinux2014_aarch64.manylinux_2_17_aarch64.whl",
+            "311f14749b67467cd05e8077c961841a05f6d25357d1ce11c20f94950e071f3e",
+        ),
+    },
+}
+
+
+class NvmlHeaders(Package):
+    """
+    NVML headers and a link stub for building against the NVIDIA Management Library.
+
+    Installs nvml.h from NVIDIA's header-only redistributable and generates a
+    libnvidia-ml.so.1 stub in lib/stubs so that consumers such as Slurm's
+    gpu/nvml plugin can be configured and linked without the CUDA toolkit.
+    The real libnvidia-ml.so.1 comes from the GPU driver and is resolved by
+    the dynamic loader on the node at runtime.
+    """
+
+    homepage = "https://developer.nvidia.com/management-library-nvml"
+
+    for ver, packages in _versions.items():
+        pkg = packages.get(platform.machine())
+        if pkg:
+            version(ver, url=pkg[0], sha256=pkg[1], expand=False)
+
+    depends_on("c", type="build")
+
+    @property
+    def libs(self):
+        # Empty on purpose: Spack's wrapper would add lib/stubs to the RPATH of
+        # every dependent, and the stub would then shadow the driver's library
+        # at runtime. Dependents pass -L<prefix>/lib/stubs themselves.
+        return LibraryList([])
+
+    @property
+    def headers(self):
+        return find_headers("nvml", root=self.prefix.include, recursive=False)
+
+    @staticmethod
+    def _stub_symbols(header):
+        """Return every NVML entry point declared (or aliased) in nvml.h."""
+        with open(header, "r") as f:
+            content = f.read()
+        symbols = set(re.findall(r"DECLDIR\s+(nvml\w+)\s*\(", content))
+        # Unversioned names (nvmlInit -> nvmlInit_v2) are macros in the header
+        # but real exports in the driver library; configure probes for them.
+        symbols.update(re.findall(r"#\s*define\s+(nvml\w+)\s+nvml\w+_v\d+\b", content))
+        return sorted(symbols)
+
+    def install(self, spec, prefix):
+        # With expand=False Spack leaves the wheel untouched in the source dir.
+        wheel_file = glob.glob(join_path(self.stage.source_path, "*.whl"))[0]
+        with zipfile.ZipFile(wheel_file) as wheel:
+            wheel.extractall(self.stage.source_path)
+
+        headers = glob.glob(join_path(self.stage.source_path, "nvidia", "*", "include", "nvml.h"))
+        if not headers:
+            raise InstallError("nvml.h not found in the nvidia-nvml-dev wheel")
+        mkdirp(prefix.include)
+        install(headers[0], prefix.include)
+
+        # Every stub returns NVML_ERROR_UNKNOWN; it only exists to satisfy the
+        # linker and is never loaded at runtime.
+        symbols = self._stub_symbols(headers[0])
+        stub_src = join_path(self.stage.source_path, "nvml_stub.c")
+        with open(stub_src, "w") as f:
+            for symbol in symbols:
+                f.write(f"int {symbol}(void) {{ return 999; }}\n")
+
+        stubs_dir = join_path(prefix.lib, "stubs")
+        mkdirp(stubs_dir)
+        stub_so = join_path(stubs_dir, "libnvidia-ml.so.1")
+        cc = Executable(self.compiler.cc)
+        cc("-shared", "-fPIC", "-Wl,-soname,libnvidia-ml.so.1", stub_src, "-o", stub_so)
+        os.symlink("libnvidia-ml.so.1", join_path(stubs_dir, "libnvidia-ml.so"))
+
+        tty.msg(f"✓ Installed nvml.h and a libnvidia-ml stub exporting {len(symbols)} symbols")
@@ -2,14 +2,21 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import json
 import os
 import re
+import statistics
+import subprocess
+import sys
 
 from spack.package import *
 from spack_repo.builtin.build_systems.generic import Package
 
+from spack_repo.slurm_factory.build_systems.linker import LinkerPackage
+from spack_repo.slurm_factory.build_systems.profiling import ProfilingPackage
 
-class Openssl(Package):  # Uses Fake Autotools, should subclass Package
+
+class Openssl(Package, LinkerPackage, ProfilingPackage):  # Uses Fake Autotools, should subclass Package
     """
     OpenSSL is an open source project that provides a robust, commercial-grade toolkit.
 
@@ -47,13 +54,24 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
     )
     variant("docs", default=False, description="Install docs and manpages")
     variant("shared", default=True, description="Build shared library version")
+    variant(
+        "profile",
+        default="default",
+        values=("default", "slim", "perf"),
+        multi=False,
+        description="Feature set: upstream defaults, slim (no legacy provider, engines, "
+        "pre-1.1.1 deprecated APIs, DTLS/SSLv3 or zlib) or perf (asm required, "
+        "ec_nistp_64_gcc_128, tuned flags)",
+    )
     with when("platform=windows"):
         variant("dynamic", default=False, description="Link with MSVC's dynamic runtime library")
 
     depends_on("c", type="build")  # generated
     depends_on("cxx", type="build")
 
-    depends_on("zlib-api")
+    # profile=slim builds without zlib
+    for _profile in ("default", "perf"):
+        depends_on("zlib-api", when=f"profile={_profile}")
     depends_on("perl@5.14.0:", type=("build", "test"))
     depends_on("ca-certificates-mozilla", type="build", when="certs=mozilla")
     depends_on("nasm", when="platform=windows")
@@ -61,6 +79,29 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
     depends_on("gmake", type="build", when="platform=linux")
     depends_on("gmake", type="build", when="platform=darwin")
 
+    # ec_nistp_64_gcc_128 needs __uint128_t on a little-endian 64-bit target
+    # that tolerates unaligned access; the asm paths are only guaranteed with
+    # GCC and Clang on x86_64 and aarch64.
+    requires(
+        "%gcc",
+        "%clang",
+        policy="one_of",
+        when="profile=perf",
+        msg="profile=perf needs GCC or Clang",
+    )
+    requires(
+        "target=x86_64:",
+        "target=aarch64:",
+        policy="one_of",
+        when="profile=perf",
+        msg="profile=perf is only supported on x86_64 and aarch64",
+    )
+    conflicts(
+        "%clang",
+        when="profile=perf target=aarch64:",
+        msg="clang cannot assemble OpenSSL's aarch64 perlasm (.arch), so the asm paths would be lost",
+    )
+
     @classmethod
     def determine_version(cls, exe):
         output = Executable(exe)("version", output=str, error=str)
@@ -77,6 +118,57 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
             runtime=False,
         )
 
+    # Pieces nothing in the Slurm stack (slurm, munge, curl, libssh2, s2n-tls,
+    # mysql client, libjwt) uses. APIs deprecated in 1.1.1 and earlier are
+    # dropped; the 3.0 deprecations (HMAC_CTX, RSA_*, EC_KEY_*) stay because
+    # munge, libssh2 and libjwt still call them.
+    slim_options = [
+        "no-legacy",
+        "no-engine",
+        "no-dynamic-engine",
+        "--api=1.1.1",
+        "no-deprecated",
+        "no-ssl3",
+        "no-ssl3-method",
+        "no-dtls",
+        "no-srp",
+        "no-comp",
+        "no-idea",
+        "no-mdc2",
+        "no-rc5",
+        "no-whirlpool",
+        "no-seed",
+        "no-sm2",
+        "no-sm3",
+        "no-sm4",
+        "no-gost",
+        "no-tests",
+    ]
+
+    # Tuned compile/link flags for profile=perf. Configure routes -Wl,* to
+    # LDFLAGS and everything else to CFLAGS; OpenSSL already builds with -O3.
+    perf_options = [
+        "enable-ec_nistp_64_gcc_128",
+        "-fno-semantic-interposition",
+        "-Wl,-O1",
+        "-Wl,--hash-style=gnu",
+        "-Wl,--as-needed",
+    ]
+
+    # Perlasm outputs that carry the AES-GCM and P-256 (ECDHE) fast paths
+    perf_required_asm = {
+        "x86_64": ("aesni-gcm-x86_64", "ecp_nistz256-x86_64"),
+        "aarch64": ("aes-gcm-armv8_64", "ecp_nistz256-armv8"),
+    }
+
+    def flag_handler(self, name, flags):
+        """Inject +profiling compile flags and the linker=mold/lld selection through the compiler wrapper."""
+        if name == "cflags":
+            flags = flags + self.profiling_flags
+        elif name == "ldflags":
+            flags = flags + self.linker_flags
+        return (flags, None, None)
+
     def handle_fetch_error(self, error):
         tty.warn(
             "Fetching OpenSSL failed. This may indicate that OpenSSL has "
@@ -96,7 +188,12 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
             # where it happens automatically?)
             env["KERNEL_BITS"] = "64"
 
-        options = ["zlib"]
+        if spec.satisfies("profile=slim"):
+            options = list(self.slim_options)
+        elif spec.satisfies("profile=perf"):
+            options = ["zlib", *self.perf_options]
+        else:
+            options = ["zlib"]
         # clang does not support the .arch directive in assembly files.
         if "clang" in self["c"].cc and spec.target.family == "aarch64":
             options.append("no-asm")
@@ -110,6 +207,12 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
             # crypto/md5/md5-x86_64.s:684:31: error: expected string
             options.append("no-asm")
 
+        if spec.satisfies("profile=perf") and "no-asm" in options:
+            raise InstallError(
+                "profile=perf requires OpenSSL's assembly paths, but this compiler/target "
+                f"combination ({spec.target.family}) would build with no-asm"
+            )
+
         # The default glibc provided by CentOS 7 does not provide proper
         # atomic support when using the NVIDIA compilers
         if self.spec.satisfies("os=centos7 %nvhpc"):
@@ -123,12 +226,13 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
         if spec.satisfies("platform=windows"):
             base_args.extend([f"CC={self.compiler.cc}", f"CXX={self.compiler.cxx}", "VC-WIN64A"])
         else:
-            base_args.extend(
-                [
-                    "-I{0}".format(self.spec["zlib-api"].prefix.include),
-                    "-L{0}".format(self.spec["zlib-api"].prefix.lib),
-                ]
-            )
+            if "zlib-api" in spec:
+                base_args.extend(
+                    [
+                        "-I{0}".format(self.spec["zlib-api"].prefix.include),
+                        "-L{0}".format(self.spec["zlib-api"].prefix.lib),
+                    ]
+                )
             base_args.extend(options)
 
         if spec.satisfies("~shared"):
@@ -159,6 +263,8 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
 
         host_make()
 
+        self.record_asm_paths()
+
         if self.run_tests:
             host_make("test", **make_args)  # 'VERBOSE=1'
 
@@ -167,6 +273,102 @@ class Openssl(Package):  # Uses Fake Autotools, should subclass Package
         # See https://github.com/openssl/openssl/issues/7466#issuecomment-432148137
         host_make(install_tgt, **make_args)
 
+    def record_asm_paths(self):
+        """
+        Write share/openssl-asm.json listing the assembly modules that were built.
+
+        Perlasm generates one .s/.S file per accelerated primitive, so the list
+        of generated files in the build tree shows which fast paths (AES-GCM,
+        P-256, SHA, Montgomery multiplication, ChaCha20-Poly1305, ...) are in
+        the libraries. With profile=perf, a missing AES-GCM or P-256 module
+        fails the build.
+        """
+        generated = sorted(
+            {
+                os.path.splitext(name)[0]
+                for root, _, files in os.walk("crypto")
+                for name in files
+                if name.endswith((".s", ".S")) and not name.startswith(".")
+            }
+        )
+        disabled = []
+        if os.path.exists("configdata.pm"):
+            with open("configdata.pm") as f:
+                match = re.search(r"our %disabled = \((.*?)\);", f.read(), re.S)
+            if match:
+                disabled = re.findall(r'"([^"]+)"\s*=>', match.group(1))
+
+        family = str(self.spec.target.family)
+        record = {
+            "profile": self.spec.variants["profile"].value,
+            "target": family,
+            "asm": "asm" not in disabled,
+            "ec_nistp_64_gcc_128": "ec_nistp_64_gcc_128" not in disabled,
+            "modules": generated,
+        }
+        mkdirp(self.prefix.share)
+        with open(join_path(self.prefix.share, "openssl-asm.json"), "w") as f:
+            json.dump(record, f, indent=2)
+        tty.msg(f"OpenSSL assembly modules ({len(generated)}): {', '.join(generated) or 'none'}")
+
+        if self.spec.satisfies("profile=perf"):
+            missing = [m for m in self.perf_required_asm.get(family, ()) if m not in generated]
+            if missing or not record["asm"] or not record["ec_nistp_64_gcc_128"]:
+                raise InstallError(
+                    "profile=perf lost assembly fast paths: "
+                    f"missing={missing} asm={record['asm']} "
+                    f"ec_nistp_64_gcc_128={record['ec_nistp_64_gcc_128']}"
+                )
+
+    @run_after("install")
+    def report_library_footprint(self):
+        """
+        Record size, relocation count and load time of libcrypto and libssl.
+
+        Every Slurm daemon and client maps these libraries, so the numbers are
+        written to share/openssl-footprint.json to compare profiles. Load time
+        is the median over fresh processes that dlopen() libssl with RTLD_NOW,
+        which also loads libcrypto and resolves every relocation.
+        """
+        if self.spec.satisfies("~shared") or self.spec.satisfies("platform=windows"):
+            return
+
+        libs = find_libraries(["libcrypto", "libssl"], root=self.prefix, recursive=True, shared=True)
+        readelf = which("readelf")
+        report = {"profile": self.spec.variants["profile"].value, "libraries": {}}
+        for lib in libs:
+            entry = {"bytes": os.path.getsize(lib)}
+            if readelf:
+                relocs = readelf("-r", "-W", lib, output=str, error=str, fail_on_error=False)
+                entry["dynamic_relocations"] = sum(
+                    1 for line in relocs.splitlines() if re.match(r"^[0-9a-f]{8,}\s", line)
+                )
+            report["libraries"][os.path.basename(lib)] = entry
+
+        libssl = [lib for lib in libs if os.path.basename(lib).startswith("libssl")]
+        if libssl:
+            probe = (
+                "import ctypes, os, time; t = time.perf_counter(); "
+                f"ctypes.CDLL({libssl[0]!r}, mode=os.RTLD_NOW | os.RTLD_GLOBAL); "
+                "print(time.perf_counter() - t)"
+            )
+            samples = []
+            for _ in range(7):
+                out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+                if out.returncode == 0:
+                    samples.append(float(out.stdout))
+            if samples:
+                report["load_microseconds"] = round(statistics.median(samples) * 1e6, 1)
+
+        mkdirp(self.prefix.share)
+        with open(join_path(self.prefix.share, "openssl-footprint.json"), "w") as f:
+            json.dump(report, f, indent=2)
+        for name, entry in report["libraries"].items():
+            relocs = entry.get("dynamic_relocations", "?")
+            tty.msg(f"{name}: {entry['bytes'] / 1048576:.2f} MiB, {relocs} relocations")
+        if "load_microseconds" in report:
+            tty.msg(f"libssl+libcrypto load time (RTLD_NOW): {report['load_microseconds']} us")
+
     @run_after("install")
     def link_system_certs(self):
         if self.spec.variants["certs"].value != "system":
@@ -0,0 +1,96 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import glob
+import os
+
+import spack.llnl.util.tty as tty
+from spack.package import *
+from spack_repo.builtin.packages.pmix.package import Pmix as BuiltinPmix
+
+
+class Pmix(BuiltinPmix):
+    """
+    PMIx tuned for Slurm's mpi/pmix plugin.
+
+    Extends the builtin PMIx recipe (versions and checksums are inherited)
+    with a choice of the global data store used to hand job-level data to
+    clients. With gds=shmem the server (slurmstepd) publishes the job-level
+    data once in a shared-memory segment that every local rank maps, instead
+    of the hash component copying it into each rank over the usock channel.
+    """
+
+    variant(
+        "gds",
+        default="shmem",
+        values=("hash", "shmem"),
+        multi=False,
+        description="Default global data store: shmem (shared-memory segment) or hash (per-rank copy)",
+    )
+    # gds/shmem first shipped in PMIx v5
+    conflicts("gds=shmem", when="@:4")
+
+    # Slurm loads libpmix into slurmstepd, so PMIx must use the same hwloc and
+    # libevent as Slurm; keep them as plain link dependencies so a unified
+    # concretization shares one copy.
+    depends_on("hwloc@2:", type=("build", "link", "run"))
+    depends_on("libevent@2:", type=("build", "link", "run"))
+
+    def configure_args(self):
+        """
+        Build the GDS components the variant selects.
+
+        gds/shmem is built by default when its configure checks pass and is
+        silently skipped otherwise; check_gds_component catches that.
+        gds=hash leaves the unused component out of the build.
+        """
+        args = super().configure_args()
+        if self.spec.satisfies("gds=hash"):
+            args.append("--enable-mca-no-build=gds-shmem")
+        return args
+
+    @run_after("install")
+    def check_gds_component(self):
+        """Fail a gds=shmem install whose build skipped the mca_gds_shmem component."""
+        if not self.spec.satisfies("gds=shmem"):
+            return
+        # Installed as a DSO in lib/pmix, or linked into libpmix with --enable-mca-static
+        if glob.glob(join_path(self.prefix, "lib*", "pmix", "mca_gds_shmem.so")):
+            return
+        for lib in glob.glob(join_path(self.prefix, "lib*", "libpmix.so*")):
+            if not os.path.islink(lib):
+                with open(lib, "rb") as f:
+                    if b"mca_gds_shmem_component" in f.read():
+                        return
+        raise InstallError(
+            "gds=shmem: PMIx was built without the mca_gds_shmem component",
+            "Check the gds/shmem results in config.log, or build with gds=hash",
+        )
+
+    @run_after("install")
+    def write_gds_params(self):
+        """
+        Select the configured GDS through PMIx's default MCA parameter file.
+
+        PMIx reads <sysconfdir>/pmix-mca-params.conf at init, so the choice
+        applies to the Slurm server side and all clients without any
+        environment setup on the nodes. hash stays in the list as a fallback
+        for data the shmem component does not store.
+        """
+        gds = self.spec.variants["gds"].value
+        params = join_path(self.prefix.etc, "pmix-mca-params.conf")
+        mkdirp(self.prefix.etc)
+        with open(params, "a") as f:
+            f.write("# Written by slurm_factory.pmix\n")
+            f.write("gds = shmem,hash\n" if gds == "shmem" else "gds = hash\n")
+        tty.msg(f"✓ PMIx default gds set to {gds} in {params}")
@@ -37,12 +37,14 @@ class Pyxis(MakefilePackage):
 
     depends_on("c", type="build")
 
-    # Pyxis builds against slurm headers (spank.h)
+    # Pyxis builds against slurm headers (spank.h), which slurm-dev provides
+    # even when Slurm itself is installed +slim
     depends_on("slurm_factory.slurm", type=("build", "link"))
+    depends_on("slurm_factory.slurm-dev", type="build")
 
     def setup_build_environment(self, env):
-        slurm_prefix = self.spec["slurm"].prefix
-        env.append_flags("CPPFLAGS", f"-I{slurm_prefix}/include")
+        slurm_dev_prefix = self.spec["slurm-dev"].prefix
+        env.append_flags("CPPFLAGS", f"-I{slurm_dev_prefix}/include")
 
     @property
     def build_targets(self):
@@ -18,8 +18,11 @@ import spack.util.executable as exe
 from spack_repo.builtin.build_systems.cmake import CMakePackage
 from spack.package import *
 
+from spack_repo.slurm_factory.build_systems.linker import LinkerPackage
+from spack_repo.slurm_factory.build_systems.profiling import ProfilingPackage
 
-class S2nTls(CMakePackage):
+
+class S2nTls(CMakePackage, LinkerPackage, ProfilingPackage):
     """
     s2n-tls is a C99 implementation of the TLS/SSL protocols.
 
@@ -56,6 +59,14 @@ class S2nTls(CMakePackage):
             runtime=False,
         )
 
+    def flag_handler(self, name, flags):
+        """Inject +profiling compile flags and the linker=mold/lld selection through the compiler wrapper."""
+        if name == "cflags":
+            flags = flags + self.profiling_flags
+        elif name == "ldflags":
+            flags = flags + self.linker_flags
+        return (flags, None, None)
+
     @property
     def _openssl_lib_dir(self):
         """Detect the correct OpenSSL lib directory (lib64 vs lib)."""
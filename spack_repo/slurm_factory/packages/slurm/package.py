@@ -13,14 +13,20 @@
 # limitations under the License.
 import os
 import re
+import time
 
 import spack.llnl.util.tty as tty
 import spack.util.executable as exe
 from spack.package import *
 from spack_repo.builtin.build_systems.autotools import AutotoolsPackage
 
+from spack_repo.slurm_factory.build_systems.bolt import BoltOptimizer
+from spack_repo.slurm_factory.build_systems.configure_cache import ConfigureCache
+from spack_repo.slurm_factory.build_systems.linker import LinkerPackage
+from spack_repo.slurm_factory.build_systems.profiling import ProfilingPackage
 
-class Slurm(AutotoolsPackage):
+
+class Slurm(AutotoolsPackage, LinkerPackage, ProfilingPackage):
     """
     Slurm is an open source, fault-tolerant, and highly scalable cluster management system.
 
@@ -55,7 +61,97 @@ class Slurm(AutotoolsPackage):
     )
     variant("gtk", default=False, description="Enable GTK+ support")
     variant("nvml", default=False, description="Enable NVML autodetection")
+    variant(
+        "nvml_provider",
+        default="headers",
+        values=("headers", "cuda"),
+        when="+nvml",
+        description="Build gpu/nvml against nvml-headers (header + link stub) or a full CUDA toolkit",
+    )
     variant("rsmi", default=False, description="Enable ROCm SMI support")
+    variant("ucx", default=False, description="Enable UCX direct-connect transport for the mpi/pmix plugin")
+    variant(
+        "lua",
+        default="lua",
+        values=("lua", "luajit"),
+        multi=False,
+        description="Lua implementation for the job_submit, cli_filter and burst_buffer Lua plugins",
+    )
+    variant(
+        "auth",
+        default="both",
+        values=("munge", "slurm", "both"),
+        multi=False,
+        description="Authentication plugins: auth/munge (needs munged), the built-in auth/slurm "
+        "(Slurm 23.11+, no munge dependency) or both",
+    )
+    variant(
+        "reproducible",
+        default=False,
+        description="Normalize timestamps and build paths so rebuilds produce identical install trees",
+    )
+    variant(
+        "build_profile",
+        default="default",
+        values=("default", "perf"),
+        multi=False,
+        description="Compiler optimization profile applied to the whole Slurm build",
+    )
+    variant(
+        "bolt",
+        default="none",
+        values=("none", "instrument", "sample"),
+        multi=False,
+        description="Rewrite the code layout of slurmctld, slurmd and libslurmfull with llvm-bolt after "
+        "install, using an instrumented or perf-sampled profile of a loopback workload",
+    )
+    variant(
+        "slim",
+        default=False,
+        description="Prune static archives, libtool .la files and other build-only files after install",
+    )
+    variant(
+        "slim_headers",
+        default=True,
+        when="+slim",
+        description="Also drop include/ and pkgconfig (build plugins such as Pyxis against slurm-dev)",
+    )
+    variant("slim_docs", default=True, when="+slim", description="Also drop man pages and HTML docs")
+    variant(
+        "shared_libslurm",
+        default=True,
+        description="Link commands and daemons against the shared libslurmfull; ~shared_libslurm links "
+        "libslurmfull into each of them (--without-shared-libslurm) for faster client startup",
+    )
+    variant(
+        "separate_debug",
+        default=False,
+        description="Move DWARF into lib/debug/.build-id and strip debug sections from installed ELF files",
+    )
+
+    requires(
+        "%gcc",
+        "%clang",
+        policy="one_of",
+        when="build_profile=perf",
+        msg="build_profile=perf flags are only tested with GCC and Clang",
+    )
+    requires("@23-11:", when="auth=slurm", msg="auth/slurm was added in Slurm 23.11")
+    for _mode in ("instrument", "sample"):
+        requires(
+            "target=x86_64:",
+            "target=aarch64:",
+            policy="one_of",
+            when=f"bolt={_mode}",
+            msg="llvm-bolt rewrites x86_64 and aarch64 ELF binaries only",
+        )
+        conflicts("platform=darwin", when=f"bolt={_mode}", msg="llvm-bolt rewrites ELF binaries only")
+        conflicts(
+            "+reproducible",
+            when=f"bolt={_mode}",
+            msg="the training profile, and so the code layout, differs between builds",
+        )
+        depends_on("llvm@16:+bolt", type="build", when=f"bolt={_mode}")
 
     # TODO: add support for checkpoint/restart (BLCR)
 
@@ -64,6 +160,7 @@ class Slurm(AutotoolsPackage):
     depends_on("s2n-tls", type=("build", "link", "run"), when="@25:")
     # patchelf is needed to fix rpaths for tls_s2n.so plugin
     depends_on("patchelf", type="build", when="@25:")
+    depends_on("patchelf", type="build", when="~shared_libslurm")
 
     # Dependencies
     depends_on("c", type="build")
@@ -72,8 +169,8 @@ class Slurm(AutotoolsPackage):
     depends_on("pkgconfig", type="build")
 
     # Link-only dependencies (headers + static libs, compiled in, not needed as runtime packages)
-    # librdkafka is needed for the Kafka job scheduler - usually linked statically
-    depends_on("librdkafka", type="link")
+    # librdkafka for the jobcomp/kafka plugin - PIC archive linked into the plugin
+    depends_on("slurm_factory.librdkafka", type="link")
     # http-parser needed for slurmrestd and influxdb plugin - static library
     depends_on("http-parser", type="link")
     depends_on("libyaml", type="link")
@@ -88,9 +185,12 @@ class Slurm(AutotoolsPackage):
     depends_on("json-c", type=("build", "link"))
     depends_on("lz4", type=("build", "link"))
     depends_on("ncurses", type=("build", "link"))
-    depends_on("lua", type=("build", "link"))
+    depends_on("lua", type=("build", "link"), when="lua=lua")
+    # OpenResty's LuaJIT 2.1 branch: maintained, and JITs on x86_64 and aarch64
+    depends_on("lua-luajit-openresty", type=("build", "link"), when="lua=luajit")
     depends_on("readline", type=("build", "link"))
-    depends_on("hwloc", type=("build", "link"))
+    # run: slurm-topology-cache calls lstopo-no-graphics from this prefix
+    depends_on("hwloc", type=("build", "link", "run"))
 
     # Full runtime dependencies (needed at runtime as separate packages)
     # curl with LDAP support is REQUIRED for Slurm's WITH_CURL conditional to be set
@@ -100,18 +200,28 @@ class Slurm(AutotoolsPackage):
     depends_on("mysql@8.0.35 +client_only", type=("build", "link", "run"))
     depends_on("openssl", type=("build", "link", "run"))
     depends_on("glib", type=("build", "link", "run"))
-    depends_on("munge", type=("build", "link", "run"))
+    for _auth in ("munge", "both"):
+        depends_on("munge", type=("build", "link", "run"), when=f"auth={_auth}")
     depends_on("libssh2", type=("build", "link", "run"))
     # JWT library is needed for auth plugins, not just REST daemon
     depends_on("libjwt", type=("build", "link", "run"))
-    depends_on("pmix@:5", type=("build", "link", "run"))
+    # PMIx from this repo: v5 with the shared-memory GDS selected by default
+    depends_on("slurm_factory.pmix@5", type=("build", "link", "run"))
+    # mpi/pmix uses UCX for direct-connect modex and collectives when
+    # PMIxDirectConnUCX=true is set in mpi.conf
+    depends_on("ucx", when="+ucx", type=("build", "link", "run"))
     depends_on("zlib-api", type=("build", "link", "run"))
     depends_on("hdf5", type=("build", "link", "run"))
 
     # Conditional dependencies
     depends_on("gtkplus", when="+gtk", type=("build", "link"))
-    depends_on("cuda", when="+nvml")
-    depends_on("rocm-smi-lib", when="+rsmi")
+    # The gpu/nvml plugin only needs nvml.h and something to link against;
+    # libnvidia-ml.so.1 itself comes from the GPU driver on the node.
+    depends_on("slurm_factory.nvml-headers", when="+nvml nvml_provider=headers", type=("build", "link"))
+    depends_on("cuda", when="+nvml nvml_provider=cuda")
+    # rocm-smi-lib is a standalone library (no HIP/ROCm toolchain), so it is
+    # already lightweight; it is only needed to build and link the plugin.
+    depends_on("rocm-smi-lib", when="+rsmi", type=("build", "link"))
 
     # Apply custom patches
     # NOTE: We don't patch Makefile.am because it requires autoreconf, which causes
@@ -141,14 +251,74 @@ class Slurm(AutotoolsPackage):
 
         return f"https://download.schedmd.com/slurm/slurm-{release_version}.tar.bz2"
 
+    @property
+    def source_date_epoch(self):
+        """
+        Timestamp used for SOURCE_DATE_EPOCH in reproducible builds.
+
+        Derived from the release tarball (the mtime of the shipped configure
+        script) so it is stable across rebuilds of the same version.
+        """
+        configure_script = join_path(self.stage.source_path, "configure")
+        if os.path.exists(configure_script):
+            return int(os.path.getmtime(configure_script))
+        return 0
+
+    @property
+    def prefix_map_flags(self):
+        """Compiler flags that strip the build stage path from objects and debug info."""
+        if not self.spec.satisfies("+reproducible"):
+            return []
+        return [f"-ffile-prefix-map={self.stage.path}=/builddir"]
+
+    @property
+    def lua_prefix(self):
+        """Install prefix of the Lua implementation selected by the lua variant."""
+        if self.spec.satisfies("lua=luajit"):
+            return self.spec["lua-luajit-openresty"].prefix
+        return self.spec["lua"].prefix
+
+    @property
+    def lua_include_dir(self):
+        """Directory holding lua.h; LuaJIT keeps it under include/luajit-2.1."""
+        if self.spec.satisfies("lua=luajit"):
+            return find_headers("lua", self.lua_prefix.include, recursive=True).directories[0]
+        return self.lua_prefix.include
+
+    @property
+    def build_profile_flags(self):
+        """
+        Optimization flags for build_profile=perf.
+
+        -fno-plt is deliberately not part of the set: Slurm plugins rely on
+        lazy binding for daemon-only symbols, and binding them at dlopen time
+        makes plugins fail to load in the other daemons and commands.
+
+        These replace configure's default "-g -O2", so -g is repeated here to
+        keep DWARF for +separate_debug, perf and BOLT. Functions are aligned
+        to the 64-byte cache line.
+        """
+        if not self.spec.satisfies("build_profile=perf"):
+            return []
+        return ["-g", "-O3", "-fno-semantic-interposition", "-falign-functions=64"]
+
     def flag_handler(self, name, flags):
-        wrapper_flags = None
+        wrapper_flags = []
 
         if name == "cflags":
             if self.spec.satisfies("@:20-02-1 %gcc@10:"):
-                wrapper_flags = ["-fcommon"]
-
-        return (wrapper_flags, None, flags)
+                wrapper_flags.append("-fcommon")
+            wrapper_flags.extend(self.prefix_map_flags)
+            # Through the wrapper, so configure keeps its default -O level
+            wrapper_flags.extend(self.profiling_flags)
+            wrapper_flags.extend(BoltOptimizer(self).compile_flags)
+            # Passed as CFLAGS so they replace configure's default "-g -O2"
+            # instead of being overridden by it later on the command line.
+            flags = flags + self.build_profile_flags
+        elif name == "ldflags":
+            wrapper_flags.extend(self.linker_flags)
+
+        return (wrapper_flags or None, None, flags)
 
     def setup_build_environment(self, env):
         """Set up build environment including creating missing libcurl.pc file."""
@@ -157,6 +327,14 @@ class Slurm(AutotoolsPackage):
 
         tty.msg(f"Setting up build environment for Slurm with curl at {curl_prefix}")
 
+        if spec.satisfies("+reproducible"):
+            # Pin embedded timestamps (__DATE__/__TIME__, ar members) and
+            # force a stable locale/timezone for generated files.
+            env.set("SOURCE_DATE_EPOCH", str(self.source_date_epoch))
+            env.set("TZ", "UTC")
+            env.set("LC_ALL", "C")
+            tty.msg(f"Reproducible build: SOURCE_DATE_EPOCH={self.source_date_epoch}")
+
         # Create libcurl.pc file in a writable temporary location
         # since the curl installation directory is read-only
         build_dir = self.stage.path if hasattr(self, "stage") else "/tmp"
@@ -178,7 +356,7 @@ includedir=${{prefix}}/include
 Name: libcurl
 URL: https://curl.se/
 Description: Library to transfer files with ftp, http, etc.
-Version: 8.15.0
+Version: {spec["curl"].version}
 Libs: -L${{libdir}} -lcurl
 Cflags: -I${{includedir}}
 """
@@ -226,6 +404,21 @@ Cflags: -I${{includedir}}
             except Exception as e:
                 tty.error(f"Failed to run curl-config: {e}")
 
+        # Slurm's configure only probes the lua5.x/lua pkg-config names, which
+        # LuaJIT does not install; describe it under its Lua 5.1 ABI name.
+        if spec.satisfies("lua=luajit"):
+            luajit_lib = self.lua_prefix.lib
+            with open(os.path.join(temp_pkgconfig_dir, "lua5.1.pc"), "w") as f:
+                f.write(
+                    f"""Name: lua5.1
+Description: LuaJIT (Lua 5.1 ABI) for Slurm's Lua plugins
+Version: 5.1.5
+Libs: -L{luajit_lib} -Wl,-rpath,{luajit_lib} -lluajit-5.1 -lm -ldl
+Cflags: -I{self.lua_include_dir}
+"""
+                )
+            tty.msg(f"Created lua5.1.pc for LuaJIT at {self.lua_prefix}")
+
         # Add HDF5 include paths for HDF5 profiling plugin
         if "hdf5" in spec:
             hdf5_prefix = spec["hdf5"].prefix
@@ -248,8 +441,11 @@ Cflags: -I${{includedir}}
             "--disable-debug",
             "--with-json={0}".format(spec["json-c"].prefix),
             "--with-lz4={0}".format(spec["lz4"].prefix),
-            "--with-munge={0}".format(spec["munge"].prefix),
         ]
+        if spec.satisfies("auth=slurm"):
+            args.append("--without-munge")
+        else:
+            args.append("--with-munge={0}".format(spec["munge"].prefix))
 
         # Build comprehensive CPPFLAGS and LDFLAGS
         cppflags = []
@@ -295,6 +491,10 @@ Cflags: -I${{includedir}}
 
         # PMIx support
         args.append("--with-pmix={0}".format(spec["pmix"].prefix))
+        if spec.satisfies("+ucx"):
+            args.append("--with-ucx={0}".format(spec["ucx"].prefix))
+        else:
+            args.append("--without-ucx")
 
         # Always include JWT since auth plugins need it
         args.append("--with-jwt={0}".format(spec["libjwt"].prefix))
@@ -306,9 +506,9 @@ Cflags: -I${{includedir}}
         args.append(f"--with-freeipmi={spec['freeipmi'].prefix}")
 
         # Slurm's configure uses pkg-config for Lua detection
-        lua_prefix = spec["lua"].prefix
+        lua_prefix = self.lua_prefix
         args.append("--with-lua")
-        cppflags.append("-I{0}/include".format(lua_prefix))
+        cppflags.append("-I{0}".format(self.lua_include_dir))
         ldflags.extend(["-L{0}/lib".format(lua_prefix), "-Wl,-rpath,{0}/lib".format(lua_prefix)])
 
         # PAM support
@@ -328,8 +528,14 @@ Cflags: -I${{includedir}}
         if "~gtk" in spec:
             args.append("--disable-gtktest")
 
-        if spec.satisfies("+nvml"):
+        if spec.satisfies("+nvml nvml_provider=cuda"):
             args.append(f"--with-nvml={spec['cuda'].prefix}")
+        elif spec.satisfies("+nvml"):
+            nvml_prefix = spec["nvml-headers"].prefix
+            args.append(f"--with-nvml={nvml_prefix}")
+            # Link against the stub but do not rpath it: the driver's
+            # libnvidia-ml.so.1 must be the one found at runtime.
+            ldflags.append("-L{0}".format(join_path(nvml_prefix.lib, "stubs")))
 
         if spec.satisfies("+rsmi"):
             args.append(f"--with-rsmi={spec['rocm-smi-lib'].prefix}")
@@ -352,10 +558,15 @@ Cflags: -I${{includedir}}
         if sysconfdir != "PREFIX/etc":
             args.append("--sysconfdir={0}".format(sysconfdir))
 
-        # Add RPATH for lib/slurm directory where libslurmfull.so resides
-        # This ensures slurmstepd and other binaries can find Slurm internal libraries
-        # Using $ORIGIN for relocatability - binaries in sbin/ will resolve to ../lib/slurm
-        ldflags.append("-Wl,-rpath,$ORIGIN/../lib/slurm")
+        if spec.satisfies("~shared_libslurm"):
+            # libslurmfull is linked into every command and daemon; the RPATH
+            # below is added per file by scope_libslurm_rpath() instead.
+            args.append("--without-shared-libslurm")
+        else:
+            # Add RPATH for lib/slurm directory where libslurmfull.so resides
+            # This ensures slurmstepd and other binaries can find Slurm internal libraries
+            # Using $ORIGIN for relocatability - binaries in sbin/ will resolve to ../lib/slurm
+            ldflags.append("-Wl,-rpath,$ORIGIN/../lib/slurm")
 
         # Add the combined flags if we have any
         if cppflags:
@@ -363,12 +574,20 @@ Cflags: -I${{includedir}}
         if ldflags:
             args.append("LDFLAGS={0}".format(" ".join(ldflags)))
 
+        # Opt-in config.cache (SLURM_FACTORY_CONFIGURE_CACHE)
+        args.extend(ConfigureCache(self).args)
+
         return args
 
     def configure(self, spec, prefix):
-        """Override configure to add diagnostics for WITH_CURL detection."""
-        # Run the standard autotools configure
-        super().configure(spec, prefix)
+        """Run configure through the optional config.cache and check WITH_CURL detection."""
+        parent_configure = super().configure
+        ConfigureCache(self).run(lambda: parent_configure(spec, prefix), self.check_curl_configure)
+        BoltOptimizer(self).add_link_flags()
+
+    def check_curl_configure(self):
+        """Return True if configure enabled curl (HAVE_LIBCURL and the libslurm_curl.la target)."""
+        have_libcurl = curl_target = False
 
         # After configure runs, check if WITH_CURL was set
         config_h = os.path.join(self.build_directory, "config.h")
@@ -377,6 +596,7 @@ Cflags: -I${{includedir}}
                 config_content = f.read()
                 if "HAVE_LIBCURL" in config_content:
                     tty.msg("✓ HAVE_LIBCURL is defined in config.h")
+                    have_libcurl = True
                 else:
                     tty.error("✗ HAVE_LIBCURL is NOT defined in config.h!")
 
@@ -387,50 +607,52 @@ Cflags: -I${{includedir}}
                 makefile_content = f.read()
                 if "libslurm_curl.la" in makefile_content:
                     tty.msg("✓ libslurm_curl.la target found in src/curl/Makefile")
+                    curl_target = True
                 else:
                     tty.error("✗ libslurm_curl.la target NOT found in src/curl/Makefile!")
         else:
             tty.error("✗ src/curl/Makefile does not exist!")
 
+        return have_libcurl and curl_target
+
     @run_after("install")
-    def fixup_tls_s2n_rpath(self):
+    def bolt_optimize(self):
         """
-        Fix the RPATH of tls_s2n.so plugin for relocatable deployments.
+        Post-link layout optimization of slurmctld, slurmd and libslurmfull (bolt=).
 
-        The tls_s2n.so plugin (in lib/slurm/) needs to find libs2n.so (in the
-        s2n-tls package) and libcrypto.so (in the openssl package). We add
-        $ORIGIN-relative paths so it works in spack views and tarballs.
+        Runs before the RPATH fixups so that llvm-bolt sees the files exactly
+        as the linker wrote them. patchelf edits only the dynamic section
+        afterwards, which leaves the optimized code layout alone.
         """
-        spec = self.spec
-        if not spec.satisfies("@25:"):
-            return
-
-        tls_s2n_plugin = join_path(self.prefix.lib, "slurm", "tls_s2n.so")
-        if not os.path.exists(tls_s2n_plugin):
-            tty.warn(f"tls_s2n.so not found at {tls_s2n_plugin}")
-            return
-
-        patchelf = exe.which("patchelf")
-        if not patchelf:
-            tty.warn("patchelf not found — tls_s2n.so rpath may need manual fixing")
-            return
+        BoltOptimizer(self).run()
 
-        try:
-            current_rpath = patchelf("--print-rpath", tls_s2n_plugin, output=str).strip()
-            tty.msg(f"  tls_s2n.so current rpath: {current_rpath}")
-
-            new_rpath_parts = [p for p in current_rpath.split(":") if p]
-
-            # Add $ORIGIN/.. if not already present (lib/slurm/ -> lib/)
-            if "$ORIGIN/.." not in new_rpath_parts:
-                new_rpath_parts.insert(0, "$ORIGIN/..")
+    @run_after("install")
+    def select_auth_plugins(self):
+        """
+        Make the installed auth/cred plugins match the auth variant.
 
-            new_rpath = ":".join(new_rpath_parts)
-            patchelf("--set-rpath", new_rpath, tls_s2n_plugin)
-            tty.msg(f"  tls_s2n.so new rpath: {new_rpath}")
-            tty.msg("✓ Fixed tls_s2n.so rpath")
-        except Exception as e:
-            tty.warn(f"Could not patch tls_s2n.so rpath: {e}")
+        auth/slurm and cred/slurm are always built, so auth=munge removes
+        them here; auth=slurm configures --without-munge, so there is no
+        munge plugin to remove. Runs after bolt_optimize, whose training
+        cluster uses auth/slurm.
+        """
+        auth = self.spec.variants["auth"].value
+        slurm_lib_dir = join_path(self.prefix.lib, "slurm")
+        if auth == "munge":
+            for name in os.listdir(slurm_lib_dir):
+                if name.startswith(("auth_slurm.", "cred_slurm.")):
+                    os.remove(join_path(slurm_lib_dir, name))
+
+        installed = sorted(
+            name[:-3]
+            for name in os.listdir(slurm_lib_dir)
+            if name.startswith(("auth_", "cred_")) and name.endswith(".so")
+        )
+        expected = {"munge": ["auth_munge"], "slurm": ["auth_slurm"], "both": ["auth_munge", "auth_slurm"]}
+        missing = [p for p in expected[auth] if p not in installed]
+        if missing:
+            tty.warn(f"auth={auth}: missing plugins {', '.join(missing)}")
+        tty.msg(f"✓ Auth/cred plugins: {', '.join(installed)}")
 
     @run_after("install")
     def install_curl_library(self):
@@ -463,19 +685,23 @@ Cflags: -I${{includedir}}
         curl_libs = f"-L{curl_prefix}/lib -lcurl -Wl,-rpath,{curl_prefix}/lib"
 
         lib_dir = join_path(self.prefix, "lib")
-        include_dir = join_path(self.stage.source_path, "src", "common")
 
-        # Compile slurm_curl.c to object file with PIC
+        # Compile slurm_curl.c to object file with PIC. Source paths are given
+        # relative to build_dir (the cwd below) so that no absolute stage path
+        # ends up in the object file.
         obj_file = join_path(build_dir, "slurm_curl.o")
         compile_cmd = [
             self.compiler.cc,
             "-fPIC",
             "-shared",
-            f"-I{self.stage.source_path}",
-            f"-I{include_dir}",
+            *(self.build_profile_flags or ["-g", "-O2"]),
+            *self.profiling_flags,
+            *self.prefix_map_flags,
+            "-I../..",
+            "-I../common",
             f"-I{curl_prefix}/include",
             "-c",
-            join_path(build_dir, "slurm_curl.c"),
+            "slurm_curl.c",
             "-o",
             obj_file,
         ]
@@ -488,6 +714,7 @@ Cflags: -I${{includedir}}
         link_cmd = [
             self.compiler.cc,
             "-shared",
+            *self.linker_flags,
             "-Wl,-soname,libslurm_curl.so.0",
             obj_file,
             "-o",
@@ -495,7 +722,10 @@ Cflags: -I${{includedir}}
         ] + curl_libs.split()
 
         tty.msg(f"Linking libslurm_curl.so: {' '.join(link_cmd)}")
+        start = time.perf_counter()
         subprocess.run(link_cmd, check=True, cwd=build_dir)
+        linker = self.spec.variants["linker"].value
+        tty.msg(f"Linked libslurm_curl.so with linker={linker} in {time.perf_counter() - start:.2f}s")
 
         # Create symlinks
         os.chdir(lib_dir)
@@ -519,7 +749,9 @@ Cflags: -I${{includedir}}
 
             # Rebuild with LDFLAGS pointing to libslurm_curl.so
             ldflags = f"-L{lib_dir} -lslurm_curl -Wl,-rpath,{lib_dir}"
+            start = time.perf_counter()
             make("-C", plugin_dir, f"LDFLAGS={ldflags}", "install")
+            tty.msg(f"Rebuilt influxdb plugin in {time.perf_counter() - start:.2f}s")
             tty.msg("✓ influxdb plugin rebuilt and linked against libslurm_curl.so")
 
             # Verify the plugin was linked correctly
@@ -538,8 +770,348 @@ Cflags: -I${{includedir}}
         else:
             tty.warn(f"influxdb plugin directory not found: {plugin_dir}")
 
+    @staticmethod
+    def _is_elf(path):
+        try:
+            with open(path, "rb") as f:
+                return f.read(4) == b"\x7fELF"
+        except OSError:
+            return False
+
+    @staticmethod
+    def _build_id(readelf, path):
+        """Return the GNU build-id of an ELF file, or None if it has none."""
+        try:
+            output = readelf("-n", path, output=str, error=str)
+        except Exception:
+            return None
+        match = re.search(r"Build ID:\s*([0-9a-f]+)", output)
+        return match.group(1) if match else None
+
+    @run_after("install")
+    def split_debug_info(self):
+        """
+        Move DWARF debug info out of installed ELF files into lib/debug.
+
+        Each binary, library and plugin gets a companion .debug file at
+        lib/debug/.build-id/<xx>/<rest>.debug (the layout gdb and perf look
+        up by build-id) and is then stripped of its debug sections, keeping
+        the symbol table. .gnu_debuglink only stores a basename, which gdb
+        looks up next to the file and in its .debug/ directory, so files
+        without a build-id get <dir>/.debug/<name>.debug and a debuglink
+        instead. Deployments drop lib/debug to ship only the stripped
+        binaries.
+
+        Runs after bolt_optimize and the libslurm_curl rebuild, and before
+        the patchelf RPATH fixups: objcopy can corrupt ELF files whose
+        dynamic section patchelf has already moved.
+        """
+        if not self.spec.satisfies("+separate_debug"):
+            return
+
+        objcopy = exe.which("objcopy")
+        readelf = exe.which("readelf")
+        if not objcopy or not readelf:
+            tty.warn("objcopy/readelf not found — debug info left in installed files")
+            return
+
+        debug_root = join_path(self.prefix.lib, "debug")
+        stripped_bytes = 0
+        count = 0
+        for top in (self.prefix.bin, self.prefix.sbin, self.prefix.lib):
+            for root, dirs, files in os.walk(str(top)):
+                if root == str(self.prefix.lib):
+                    dirs[:] = [d for d in dirs if d != "debug"]
+                dirs[:] = [d for d in dirs if d != ".debug"]
+                for name in files:
+                    path = join_path(root, name)
+                    if os.path.islink(path) or not self._is_elf(path):
+                        continue
+
+                    build_id = self._build_id(readelf, path)
+                    if build_id:
+                        debug_file = join_path(debug_root, ".build-id", build_id[:2], f"{build_id[2:]}.debug")
+                        strip_args = ["--strip-debug"]
+                    else:
+                        debug_file = join_path(root, ".debug", f"{name}.debug")
+                        strip_args = ["--strip-debug", f"--add-gnu-debuglink={debug_file}"]
+                    mkdirp(os.path.dirname(debug_file))
+
+                    size_before = os.path.getsize(path)
+                    try:
+                        os.chmod(path, os.stat(path).st_mode | 0o200)
+                        objcopy("--only-keep-debug", path, debug_file)
+                        objcopy(*strip_args, path)
+                    except Exception as e:
+                        tty.warn(f"Could not split debug info from {path}: {e}")
+                        continue
+                    stripped_bytes += size_before - os.path.getsize(path)
+                    count += 1
+
+        tty.msg(f"✓ Split debug info from {count} ELF files into {debug_root}")
+        tty.msg(f"  Installed ELF files shrank by {stripped_bytes / 1048576:.1f} MiB")
+
+    @run_after("install")
+    def fixup_tls_s2n_rpath(self):
+        """
+        Fix the RPATH of tls_s2n.so plugin for relocatable deployments.
+
+        The tls_s2n.so plugin (in lib/slurm/) needs to find libs2n.so (in the
+        s2n-tls package) and libcrypto.so (in the openssl package). We add
+        $ORIGIN-relative paths so it works in spack views and tarballs.
+        """
+        spec = self.spec
+        if not spec.satisfies("@25:"):
+            return
+
+        tls_s2n_plugin = join_path(self.prefix.lib, "slurm", "tls_s2n.so")
+        if not os.path.exists(tls_s2n_plugin):
+            tty.warn(f"tls_s2n.so not found at {tls_s2n_plugin}")
+            return
+
+        patchelf = exe.which("patchelf")
+        if not patchelf:
+            tty.warn("patchelf not found — tls_s2n.so rpath may need manual fixing")
+            return
+
+        try:
+            current_rpath = patchelf("--print-rpath", tls_s2n_plugin, output=str).strip()
+            tty.msg(f"  tls_s2n.so current rpath: {current_rpath}")
+
+            new_rpath_parts = [p for p in current_rpath.split(":") if p]
+
+            # Add $ORIGIN/.. if not already present (lib/slurm/ -> lib/)
+            if "$ORIGIN/.." not in new_rpath_parts:
+                new_rpath_parts.insert(0, "$ORIGIN/..")
+
+            new_rpath = ":".join(new_rpath_parts)
+            patchelf("--set-rpath", new_rpath, tls_s2n_plugin)
+            tty.msg(f"  tls_s2n.so new rpath: {new_rpath}")
+            tty.msg("✓ Fixed tls_s2n.so rpath")
+        except Exception as e:
+            tty.warn(f"Could not patch tls_s2n.so rpath: {e}")
+
+    @run_after("install")
+    def scope_libslurm_rpath(self):
+        """
+        Add the lib/slurm RPATH only to files that load a library from there.
+
+        With ~shared_libslurm the client commands carry libslurmfull
+        themselves. A global $ORIGIN/../lib/slurm entry would only add a
+        failed lookup for every DT_NEEDED entry at each startup, so
+        configure_args leaves it out. Programs in bin/ and sbin/ and plugins
+        in lib/slurm that still need a library from lib/slurm get
+        $ORIGIN/../lib/slurm (or $ORIGIN for plugins) here.
+        """
+        if self.spec.satisfies("+shared_libslurm"):
+            return
+
+        patchelf = exe.which("patchelf")
+        readelf = exe.which("readelf")
+        slurm_lib_dir = join_path(self.prefix.lib, "slurm")
+        if not patchelf or not readelf or not os.path.isdir(slurm_lib_dir):
+            tty.warn("patchelf/readelf or lib/slurm missing — lib/slurm RPATH not scoped")
+            return
+
+        private_libs = {n for n in os.listdir(slurm_lib_dir) if n.startswith("lib") and ".so" in n}
+        patched, standalone = [], 0
+        for top, origin_path in (
+            (self.prefix.bin, "$ORIGIN/../lib/slurm"),
+            (self.prefix.sbin, "$ORIGIN/../lib/slurm"),
+            (slurm_lib_dir, "$ORIGIN"),
+        ):
+            if not os.path.isdir(top):
+                continue
+            for name in sorted(os.listdir(top)):
+                path = join_path(top, name)
+                if os.path.islink(path) or not self._is_elf(path):
+                    continue
+                dynamic = readelf("-d", path, output=str, error=str)
+                needed = set(re.findall(r"\(NEEDED\)\s+Shared library: \[([^\]]+)\]", dynamic))
+                if not needed & private_libs:
+                    standalone += 1
+                    continue
+                rpath = [p for p in patchelf("--print-rpath", path, output=str).strip().split(":") if p]
+                if origin_path not in rpath:
+                    os.chmod(path, os.stat(path).st_mode | 0o200)
+                    patchelf("--set-rpath", ":".join([origin_path, *rpath]), path)
+                patched.append(os.path.relpath(path, self.prefix))
+
+        commands = [p for p in patched if p.startswith("bin/")]
+        if commands:
+            tty.warn(f"Commands still load libraries from lib/slurm: {', '.join(commands)}")
+        tty.msg(f"✓ lib/slurm RPATH on {len(patched)} files; {standalone} need nothing from lib/slurm")
+
+    @run_after("install")
+    def check_nvml_stub_rpath(self):
+        """
+        Fail the install if an ELF file has nvml-headers' lib/stubs on its RPATH.
+
+        The stub libnvidia-ml.so.1 returns an error from every call, and
+        DT_RUNPATH is searched before ld.so.cache, so an RPATH entry would
+        shadow the driver's library and break gpu/nvml autodetection.
+        """
+        if not self.spec.satisfies("+nvml nvml_provider=headers"):
+            return
+        readelf = exe.which("readelf")
+        if not readelf:
+            tty.warn("readelf not found — RPATHs not checked for the NVML stub")
+            return
+
+        stubs = join_path(self.spec["nvml-headers"].prefix.lib, "stubs")
+        offending = []
+        for top in (self.prefix.bin, self.prefix.sbin, self.prefix.lib):
+            for root, dirs, files in os.walk(str(top)):
+                dirs[:] = [d for d in dirs if d not in ("debug", ".debug")]
+                for name in files:
+                    path = join_path(root, name)
+                    if os.path.islink(path) or not self._is_elf(path):
+                        continue
+                    dynamic = readelf("-d", path, output=str, error=str)
+                    if re.search(r"\(R(?:UN)?PATH\).*" + re.escape(stubs), dynamic):
+                        offending.append(os.path.relpath(path, self.prefix))
+        if offending:
+            raise InstallError(
+                f"{len(offending)} files have {stubs} on their RPATH: {', '.join(offending[:10])}",
+                "The NVML stub would shadow the driver's libnvidia-ml.so.1 at runtime",
+            )
+        tty.msg("✓ No installed file has the NVML stub directory on its RPATH")
+
+    @run_after("install")
+    def check_profiling_sections(self):
+        """
+        Verify that +profiling binaries kept their unwind tables and symbols.
+
+        perf and eBPF samplers need .eh_frame to unwind through frames
+        without a frame pointer (hand-written assembly, libc) and .symtab to
+        name static functions. Runs after split_debug_info, which must leave
+        both in place.
+        """
+        if not self.spec.satisfies("+profiling"):
+            return
+
+        readelf = exe.which("readelf")
+        if not readelf:
+            tty.warn("readelf not found — +profiling sections not checked")
+            return
+
+        checked = 0
+        incomplete = []
+        for top in (self.prefix.bin, self.prefix.sbin, join_path(self.prefix.lib, "slurm")):
+            if not os.path.isdir(top):
+                continue
+            for name in sorted(os.listdir(top)):
+                path = join_path(top, name)
+                if os.path.islink(path) or not self._is_elf(path):
+                    continue
+                sections = set(re.findall(r"\]\s+(\.\S+)", readelf("-S", "-W", path, output=str, error=str)))
+                missing = {".eh_frame", ".symtab"} - sections
+                if missing:
+                    incomplete.append(f"{os.path.relpath(path, self.prefix)} ({', '.join(sorted(missing))})")
+                checked += 1
+
+        if incomplete:
+            tty.warn(
+                f"+profiling: {len(incomplete)} files lack unwind/symbol sections: {', '.join(incomplete)}"
+            )
+        else:
+            tty.msg(f"✓ +profiling: .eh_frame and .symtab present in {checked} ELF files")
+
+    @run_after("install")
+    def link_luajit_for_dlopen(self):
+        """
+        Give LuaJIT the liblua names Slurm dlopen()s at plugin init.
+
+        slurm_lua_init() re-opens the Lua library with RTLD_GLOBAL so that C
+        modules required from job_submit.lua can resolve Lua symbols, trying
+        only liblua*.so names. LuaJIT ships libluajit-5.1.so, so link the 5.1
+        names to it from lib/, which is on the RUNPATH of every Slurm object.
+        """
+        if not self.spec.satisfies("lua=luajit"):
+            return
+        target = join_path(self.lua_prefix.lib, "libluajit-5.1.so")
+        for name in ("liblua5.1.so", "liblua-5.1.so"):
+            link = join_path(self.prefix.lib, name)
+            if not os.path.lexists(link):
+                symlink(target, link)
+        tty.msg(f"✓ Linked liblua5.1.so -> {target}")
+
+    @run_after("install")
+    def install_topology_cache_helper(self):
+        """
+        Install sbin/slurm-topology-cache, the hwloc topology cache helper.
+
+        The script exports the node topology with lstopo to an XML file once
+        and keeps a fingerprint of the hardware next to it. Starting slurmd
+        through ``slurm-topology-cache exec slurmd ...`` points hwloc at the
+        XML via HWLOC_XMLFILE whenever the fingerprint still matches, so the
+        full discovery is skipped on every restart of an unchanged node.
+        """
+        helper = join_path(self.prefix.sbin, "slurm-topology-cache")
+        mkdirp(self.prefix.sbin)
+        install(join_path(os.path.dirname(__file__), "slurm-topology-cache"), helper)
+        filter_file("@HWLOC_PREFIX@", self.spec["hwloc"].prefix, helper, string=True, backup=False)
+        set_executable(helper)
+        tty.msg(f"✓ Installed hwloc topology cache helper at {helper}")
+
+    @property
+    def build_targets(self):
+        """
+        Make variable overrides for the build and install steps.
+
+        Slurm's configure links jobcomp_kafka.so with -lrdkafka, which picks the
+        shared library. Overriding RDKAFKA_LIBS links librdkafka.a (built PIC by
+        slurm_factory.librdkafka) and its codecs into the plugin instead, so the
+        plugin carries no runtime dependency on librdkafka.so.
+        """
+        return [f"RDKAFKA_LIBS={self.spec['librdkafka'].package.static_link_flags}"]
+
+    @run_after("install")
+    def prune_slim_install(self):
+        """
+        Remove files only needed to build against Slurm from a +slim install.
+
+        Static archives and libtool .la files (Slurm's and contribs/pmi2's)
+        always go; include/ with lib/pkgconfig and share/man with share/doc
+        go unless slim_headers / slim_docs are disabled. The headers stay
+        available to SPANK plugins through slurm_factory.slurm-dev. Runs last
+        so the earlier hooks still see a complete tree.
+        """
+        if not self.spec.satisfies("+slim"):
+            return
+
+        doomed = []
+        for root, _, files in os.walk(self.prefix):
+            doomed.extend(os.path.join(root, f) for f in files if f.endswith((".a", ".la")))
+        dirs = []
+        if self.spec.satisfies("+slim_headers"):
+            dirs += [self.prefix.include, join_path(self.prefix.lib, "pkgconfig")]
+        if self.spec.satisfies("+slim_docs"):
+            dirs += [self.prefix.share.man, self.prefix.share.doc]
+
+        def tree_bytes(path):
+            return sum(
+                os.path.getsize(os.path.join(root, f))
+                for root, _, files in os.walk(path)
+                for f in files
+                if not os.path.islink(os.path.join(root, f))
+            )
+
+        saved = sum(os.path.getsize(f) for f in doomed if not os.path.islink(f))
+        for path in doomed:
+            os.remove(path)
+        removed_dirs = [d for d in dirs if os.path.isdir(d)]
+        for path in removed_dirs:
+            saved += tree_bytes(path)
+            remove_linked_tree(path)
+
+        remaining = tree_bytes(self.prefix)
+        tty.msg(f"✓ Slim install: removed {len(doomed)} .a/.la files and {len(removed_dirs)} directories")
+        tty.msg(f"  Saved {saved / 1048576:.1f} MiB; prefix is now {remaining / 1048576:.1f} MiB")
+
     def install(self, spec, prefix):
-        make("install")
+        # Pass the overrides again: libtool may relink the plugin on install
+        make("install", *self.build_targets)
         make("-C", "contribs/pmi2", "install")
         make("-C", "contribs/nss_slurm", "install")
 
@@ -0,0 +1,57 @@
+# Copyright (c) 2025 Vantage Compute Corporation. and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import spack.llnl.util.tty as tty
+from spack.package import *
+from spack_repo.builtin.build_systems.autotools import AutotoolsPackage
+
+from spack_repo.slurm_factory.packages.slurm.package import Slurm
+
+
+class SlurmDev(AutotoolsPackage):
+    """
+    Development headers for slurm_factory.slurm (slurm.h, slurmdb.h, spank.h, ...).
+
+    The dev component of Slurm, for building SPANK plugins such as Pyxis
+    against a slurm+slim install whose prefix no longer carries include/.
+    It configures the same Slurm release and installs only the public
+    headers, including the generated slurm_version.h.
+    """
+
+    homepage = "https://slurm.schedmd.com"
+    url = "https://download.schedmd.com/slurm/slurm-21.08.8.tar.bz2"
+
+    license("GPL-2.0-or-later")
+
+    # The releases, checksums and download URLs of slurm_factory.slurm
+    for _ver, _args in Slurm.versions.items():
+        version(str(_ver), **_args)
+
+    depends_on("c", type="build")
+
+    # Headers describe the runtime library of the very same release
+    for _ver in Slurm.versions:
+        depends_on(f"slurm_factory.slurm@{_ver}", type="run", when=f"@{_ver}")
+
+    url_for_version = Slurm.url_for_version
+
+    def configure_args(self):
+        # Only slurm/ is built, so none of the optional libraries are needed
+        return ["--disable-developer", "--disable-debug"]
+
+    def build(self, spec, prefix):
+        make("-C", "slurm")
+
+    def install(self, spec, prefix):
+        make("-C", "slurm", "install")
+        tty.msg(f"✓ Installed Slurm headers to {prefix.include.slurm}")